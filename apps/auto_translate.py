@@ -0,0 +1,254 @@
+import asyncio
+import json
+import time
+from collections import Counter
+
+import nextcord
+
+from apps.db import get_database
+from apps.sharding import owns_guild
+from apps.translation import TranslationError
+
+MESSAGE_LIMIT = 2000
+WEBHOOK_NAME = "Auto Translate"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS auto_translate_channels (
+    channel_id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    targets TEXT NOT NULL
+)
+"""
+
+
+class TranslateChannelStore:
+    """Auto-translate channels and their target languages, cached in memory."""
+
+    def __init__(self, db=None):
+        self.db = db or get_database()
+        self.db.executescript(SCHEMA)
+        self._channels = {}
+        for row in self.db.execute("SELECT * FROM auto_translate_channels"):
+            if owns_guild(row["guild_id"]):
+                self._channels[row["channel_id"]] = json.loads(row["targets"])
+
+    def targets(self, channel_id):
+        return self._channels.get(channel_id)
+
+    def for_guild(self, guild):
+        return {cid: targets for cid, targets in self._channels.items() if guild.get_channel(cid)}
+
+    async def set(self, guild_id, channel_id, targets):
+        self._channels[channel_id] = targets
+        await self.db.run(
+            "INSERT INTO auto_translate_channels (channel_id, guild_id, targets) VALUES (?, ?, ?) "
+            "ON CONFLICT(channel_id) DO UPDATE SET targets = excluded.targets",
+            (channel_id, guild_id, json.dumps(targets)),
+        )
+
+    async def remove(self, channel_id):
+        if self._channels.pop(channel_id, None) is None:
+            return False
+        await self.db.run("DELETE FROM auto_translate_channels WHERE channel_id = ?", (channel_id,))
+        return True
+
+
+class TokenBucket:
+    """Refills ``rate`` tokens per second up to ``capacity``."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, amount):
+        self._refill()
+        if amount > self.tokens:
+            return False
+        self.tokens -= amount
+        return True
+
+    def refund(self, amount):
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def available(self):
+        self._refill()
+        return int(self.tokens)
+
+
+class AutoTranslator:
+    """Translates messages in auto-translate channels in short micro-batches.
+
+    Each channel gets a bounded queue and one worker task, like the mod-log
+    writer. Messages accumulate for up to ``window`` seconds (or until
+    ``batch_size`` are waiting). Each target language is then translated in
+    one call through the shared caching client and posted as one webhook
+    message. Provider quota is guarded per guild by a token bucket charged
+    with the characters that miss the cache; a batch that does not fit is
+    dropped.
+    """
+
+    def __init__(self, bot, translator, store, window=1.5, batch_size=20, max_buffer=200,
+                 budget_per_minute=5000, burst=10000):
+        self.bot = bot
+        self.translator = translator
+        self.store = store
+        self.window = window
+        self.batch_size = batch_size
+        self.max_buffer = max_buffer
+        self.budget_rate = budget_per_minute / 60
+        self.burst = burst
+        self._queues = {}
+        self._workers = {}
+        self._buckets = {}
+        self._webhooks = {}
+        self.translated = Counter()
+        self.batches = Counter()
+        self.dropped = Counter()
+
+    def put(self, message):
+        queue = self._queue(message.channel.id)
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped[message.guild.id] += 1
+
+    def bucket(self, guild_id):
+        bucket = self._buckets.get(guild_id)
+        if bucket is None:
+            bucket = self._buckets[guild_id] = TokenBucket(self.budget_rate, self.burst)
+        return bucket
+
+    def stats(self, guild_id):
+        return {
+            "translated": self.translated[guild_id],
+            "batches": self.batches[guild_id],
+            "dropped": self.dropped[guild_id],
+            "budget": self.bucket(guild_id).available(),
+        }
+
+    def forget_channel(self, channel_id):
+        task = self._workers.pop(channel_id, None)
+        if task is not None:
+            task.cancel()
+        self._queues.pop(channel_id, None)
+        self._webhooks.pop(channel_id, None)
+
+    def close(self):
+        for task in self._workers.values():
+            task.cancel()
+        self._workers.clear()
+        self._queues.clear()
+        self._webhooks.clear()
+
+    # -----------------------
+    # Internals
+    # -----------------------
+    def _queue(self, channel_id):
+        queue = self._queues.get(channel_id)
+        if queue is None:
+            queue = self._queues[channel_id] = asyncio.Queue(maxsize=self.max_buffer)
+            self._workers[channel_id] = asyncio.create_task(self._worker(channel_id, queue))
+        return queue
+
+    async def _worker(self, channel_id, queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout=timeout))
+                except asyncio.TimeoutError:
+                    break
+            targets = self.store.targets(channel_id) or []
+            try:
+                if targets:
+                    # resolve the webhook once so concurrent targets do not each create one
+                    await self._webhook(batch[0].channel)
+                await asyncio.gather(*(self._flush(batch, target) for target in targets))
+            except Exception as e:
+                self.dropped[batch[0].guild.id] += len(batch)
+                print(f"Auto-translate batch failed in channel {channel_id}: {e}")
+
+    async def _flush(self, batch, target):
+        guild_id = batch[0].guild.id
+        try:
+            texts = [message.content for message in batch]
+            _, missing = await asyncio.to_thread(self.translator.lookup, texts, target)
+            charge = sum(len(text) for text in missing)
+            if not self.bucket(guild_id).take(charge):
+                self.dropped[guild_id] += len(batch)
+                return
+            try:
+                translated = await asyncio.to_thread(self.translator.translate_many, texts, target)
+            except TranslationError:
+                # nothing was translated, so a provider outage must not use up the quota
+                self.bucket(guild_id).refund(charge)
+                raise
+            lines = [
+                f"**{message.author.display_name}**: {text}"
+                for message, text in zip(batch, translated)
+                if text.strip() and text.strip() != message.content.strip()
+            ]
+            if lines:
+                await self._post(batch[0].channel, target, lines)
+            self.translated[guild_id] += len(batch)
+            self.batches[guild_id] += 1
+        except (TranslationError, nextcord.HTTPException) as e:
+            self.dropped[guild_id] += len(batch)
+            print(f"Auto-translate to {target} failed in channel {batch[0].channel.id}: {e}")
+
+    async def _webhook(self, channel):
+        webhook = self._webhooks.get(channel.id)
+        if webhook is None:
+            webhook = next(
+                (w for w in await channel.webhooks() if w.user == self.bot.user and w.name == WEBHOOK_NAME), None
+            )
+            if webhook is None:
+                webhook = await channel.create_webhook(name=WEBHOOK_NAME)
+            self._webhooks[channel.id] = webhook
+        return webhook
+
+    async def _post(self, channel, target, lines):
+        # Normally one message per batch; only very long batches are split
+        for content in self._chunks(lines, f"🌐 **{target.upper()}**"):
+            for attempt in range(2):
+                webhook = await self._webhook(channel)
+                try:
+                    await webhook.send(
+                        content,
+                        username=f"Translate ({target.upper()})",
+                        avatar_url=self.bot.user.display_avatar.url,
+                        allowed_mentions=nextcord.AllowedMentions.none(),
+                    )
+                    break
+                except nextcord.NotFound:
+                    # webhook was deleted; recreate it once
+                    self._webhooks.pop(channel.id, None)
+                    if attempt:
+                        raise
+
+    @staticmethod
+    def _chunks(lines, header):
+        chunk, size = [header], len(header)
+        for line in lines:
+            line = line[:MESSAGE_LIMIT - len(header) - 1]
+            if size + len(line) + 1 > MESSAGE_LIMIT:
+                yield "\n".join(chunk)
+                chunk, size = [header], len(header)
+            chunk.append(line)
+            size += len(line) + 1
+        yield "\n".join(chunk)
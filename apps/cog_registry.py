@@ -0,0 +1,160 @@
+import asyncio
+import json
+import sys
+import time
+import tracemalloc
+import traceback
+
+from nextcord.ext import commands
+
+from apps.components import get_router
+
+
+class CogStats:
+    __slots__ = ("name", "load_ms", "new_modules", "memory_kb", "loaded_at", "reloads")
+
+    def __init__(self, name):
+        self.name = name
+        self.load_ms = 0.0
+        # modules first imported by this load: the cog's dependency cost
+        self.new_modules = 0
+        # only measured with trace_memory, which slows loading down
+        self.memory_kb = None
+        self.loaded_at = None
+        self.reloads = 0
+
+    def summary(self):
+        text = f"{self.load_ms:.1f}ms, {self.new_modules} new modules"
+        if self.memory_kb is not None:
+            text += f", {self.memory_kb:.0f} KiB"
+        return text
+
+
+class CogRegistry:
+    """Loads cogs from a JSON manifest and records what each one costs.
+
+    Manifest entries look like ``{"xp": {"enabled": true}}``. A cog marked
+    ``"lazy": true`` is not imported at startup; it is loaded the first
+    time one of its listed prefix ``commands`` or component ``components``
+    prefixes is used. Load time (one ``load_extension`` call) and the number
+    of modules it pulled into ``sys.modules`` are recorded per cog, also on
+    hot reload. With ``trace_memory`` the memory allocated while loading is
+    measured as well. A cog loaded after the bot is ready gets its
+    ``on_ready`` listeners called right away, so the background tasks they
+    start (unmutes, XP flushing, reconciles) run after a reload too.
+    """
+
+    def __init__(self, bot, manifest_path, package="apps.cogs", trace_memory=False):
+        self.bot = bot
+        self.manifest_path = manifest_path
+        self.package = package
+        self.trace_memory = trace_memory
+        self.manifest = {}
+        self.stats = {}
+        self._lazy_commands = {}
+        self._lazy_components = {}
+        bot.cog_registry = self
+        bot.add_listener(self.on_command_error, "on_command_error")
+        get_router(bot).loader = self.load_for_component
+
+    def read_manifest(self):
+        with open(self.manifest_path, "r") as f:
+            self.manifest = json.load(f)
+        return self.manifest
+
+    def load_enabled(self):
+        self.read_manifest()
+        for name, entry in self.manifest.items():
+            if not entry.get("enabled", True):
+                continue
+            if entry.get("lazy"):
+                for command in entry.get("commands", []):
+                    self._lazy_commands[command] = name
+                for prefix in entry.get("components", []):
+                    self._lazy_components[prefix] = name
+                print(f"Deferred {name} until first use")
+                continue
+            try:
+                self.load(name)
+            except Exception as e:
+                print(f"Failed to load cog {name}: {e}")
+
+    # -----------------------
+    # Load / unload / reload
+    # -----------------------
+    def extension(self, name):
+        return f"{self.package}.{name}"
+
+    def is_loaded(self, name):
+        return self.extension(name) in self.bot.extensions
+
+    def load(self, name):
+        return self._measure(name, self.bot.load_extension)
+
+    def reload(self, name):
+        stats = self._measure(name, self.bot.reload_extension)
+        stats.reloads += 1
+        return stats
+
+    def unload(self, name):
+        self.bot.unload_extension(self.extension(name))
+
+    def _measure(self, name, action):
+        path = self.extension(name)
+        tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        memory_before = tracemalloc.get_traced_memory()[0] if self.trace_memory else 0
+        modules_before = len(sys.modules)
+        try:
+            start = time.perf_counter()
+            action(path)
+            done = time.perf_counter()
+            memory_after = tracemalloc.get_traced_memory()[0] if self.trace_memory else 0
+        finally:
+            if tracing:
+                tracemalloc.stop()
+        stats = self.stats.get(name) or CogStats(name)
+        stats.load_ms = (done - start) * 1000
+        stats.new_modules = len(sys.modules) - modules_before
+        stats.memory_kb = (memory_after - memory_before) / 1024 if self.trace_memory else None
+        stats.loaded_at = time.time()
+        self.stats[name] = stats
+        self._lazy_commands = {k: v for k, v in self._lazy_commands.items() if v != name}
+        self._lazy_components = {k: v for k, v in self._lazy_components.items() if v != name}
+        print(f"Loaded {name}: {stats.summary()}")
+        if self.bot.is_ready():
+            self._dispatch_ready(path)
+        return stats
+
+    def _dispatch_ready(self, path):
+        for cog in list(self.bot.cogs.values()):
+            if type(cog).__module__ != path:
+                continue
+            for event, listener in cog.get_listeners():
+                if event == "on_ready":
+                    asyncio.get_running_loop().create_task(listener())
+
+    # -----------------------
+    # Lazy loading hooks
+    # -----------------------
+    def load_for_component(self, prefix):
+        name = self._lazy_components.get(prefix)
+        if name is None:
+            return False
+        self.load(name)
+        return True
+
+    async def on_command_error(self, ctx, error):
+        if isinstance(error, commands.CommandNotFound):
+            name = self._lazy_commands.get(ctx.invoked_with)
+            if name is not None:
+                self.load(name)
+                return await self.bot.invoke(await self.bot.get_context(ctx.message))
+        # Registering a listener replaces the library's default error print
+        if ctx.command and ctx.command.has_error_handler():
+            return
+        if ctx.cog and ctx.cog.has_error_handler():
+            return
+        print(f"Ignoring exception in command {ctx.command}:", file=sys.stderr)
+        traceback.print_exception(type(error), error, error.__traceback__, file=sys.stderr)
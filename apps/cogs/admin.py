@@ -0,0 +1,58 @@
+import nextcord
+from nextcord.ext import commands
+
+class AdminCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @property
+    def registry(self):
+        return self.bot.cog_registry
+
+    # -----------------------
+    # Cog management (owner only)
+    # -----------------------
+    @commands.command(name="cogs")
+    @commands.is_owner()
+    async def list_cogs(self, ctx):
+        lines = []
+        for name, entry in self.registry.read_manifest().items():
+            stats = self.registry.stats.get(name)
+            if not entry.get("enabled", True):
+                state = "disabled"
+            elif self.registry.is_loaded(name):
+                state = f"loaded: {stats.summary()}, {stats.reloads} reloads" if stats else "loaded"
+            else:
+                state = "lazy, not loaded yet" if entry.get("lazy") else "not loaded"
+            lines.append(f"`{name}` — {state}")
+        await ctx.send("\n".join(lines) or "No cogs in manifest.")
+
+    @commands.command(name="load")
+    @commands.is_owner()
+    async def load_cog(self, ctx, name: str):
+        try:
+            stats = self.registry.load(name)
+            await ctx.send(f"Loaded `{name}` in {stats.load_ms:.1f}ms.")
+        except Exception as e:
+            await ctx.send(f"Failed to load `{name}`: {e}")
+
+    @commands.command(name="unload")
+    @commands.is_owner()
+    async def unload_cog(self, ctx, name: str):
+        try:
+            self.registry.unload(name)
+            await ctx.send(f"Unloaded `{name}`.")
+        except Exception as e:
+            await ctx.send(f"Failed to unload `{name}`: {e}")
+
+    @commands.command(name="reload")
+    @commands.is_owner()
+    async def reload_cog(self, ctx, name: str):
+        try:
+            stats = self.registry.reload(name)
+            await ctx.send(f"Reloaded `{name}` in {stats.load_ms:.1f}ms.")
+        except Exception as e:
+            await ctx.send(f"Failed to reload `{name}`: {e}")
+
+def setup(bot):
+    bot.add_cog(AdminCog(bot))
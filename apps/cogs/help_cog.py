@@ -1,47 +1,58 @@
 import nextcord
 from nextcord.ext import commands, tasks
 
+from apps.components import get_router, stateless_view
+
+# Define pages
+HELP_PAGES = [
+    ("Moderation", "🗡️ **Moderation Commands**\n`kick`, `ban`, `mute`, `unmute`, `purge`, `automod` toggle"),
+    ("Reaction Roles", "⚔️ **Reaction Roles**\n`rr_setup`, `rr_add`, `rr_remove`"),
+    ("Levels & XP", "🛡️ **Levels & XP**\n`level`, `leaderboard`, `set_xp_rate`"),
+    ("Auto Translate", "🌐 **Auto Translate**\n`autotranslate`, `autotranslate_off`, `autotranslate_stats`"),
+    ("Tickets & Forms", "📜 **Tickets & Forms**\n`ticket`, `close_ticket`, `form`, `submit_form`"),
+    ("Server Utilities", "📊 **Server Utilities**\n`suggest`, `poll`, `stats`"),
+]
+
 class HelpCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.router = get_router(bot)
+        self.router.register("help", self.on_help_component)
+
+    def cog_unload(self):
+        self.router.unregister("help")
+
+    # -----------------------
+    # Page rendering
+    # -----------------------
+    def help_view(self, author_id, page):
+        # custom_id = help:<author>:<target page>; the select sends its page as the value
+        count = len(HELP_PAGES)
+        return stateless_view(
+            nextcord.ui.Button(emoji="⬅️", custom_id=f"help:{author_id}:{(page - 1) % count}"),
+            nextcord.ui.Button(emoji="➡️", custom_id=f"help:{author_id}:{(page + 1) % count}"),
+            nextcord.ui.Select(
+                custom_id=f"help:{author_id}:select",
+                placeholder=HELP_PAGES[page][0],
+                options=[
+                    nextcord.SelectOption(label=title, value=str(i), default=i == page)
+                    for i, (title, _) in enumerate(HELP_PAGES)
+                ],
+            ),
+        )
 
     @commands.command(name="help")
     async def help_command(self, ctx):
-        # Define pages
-        pages = [
-            "🗡️ **Moderation Commands**\n`kick`, `ban`, `mute`, `unmute`, `purge`, `automod` toggle",
-            "⚔️ **Reaction Roles**\n`rr_setup`, `rr_add`, `rr_remove`",
-            "🛡️ **Levels & XP**\n`level`, `leaderboard`, `set_xp_rate`",
-            "📜 **Tickets & Forms**\n`ticket`, `close_ticket`, `form`, `submit_form`",
-            "📊 **Server Utilities**\n`suggest`, `poll`, `stats`"
-        ]
-
-        current_page = 0
-        msg = await ctx.send(pages[current_page])
-
-        # Add navigation reactions
-        await msg.add_reaction("⬅️")
-        await msg.add_reaction("➡️")
-
-        def check(reaction, user):
-            return user == ctx.author and str(reaction.emoji) in ["⬅️", "➡️"] and reaction.message.id == msg.id
-
-        while True:
-            try:
-                reaction, user = await self.bot.wait_for("reaction_add", timeout=120.0, check=check)
-
-                if str(reaction.emoji) == "⬅️":
-                    current_page = (current_page - 1) % len(pages)
-                elif str(reaction.emoji) == "➡️":
-                    current_page = (current_page + 1) % len(pages)
-
-                await msg.edit(content=pages[current_page])
-                await msg.remove_reaction(reaction.emoji, user)
-
-            except nextcord.ext.commands.errors.CommandInvokeError:
-                break  # Stop if message deleted
-            except Exception:
-                break  # Timeout or other issues
+        await ctx.send(HELP_PAGES[0][1], view=self.help_view(ctx.author.id, 0))
+
+    async def on_help_component(self, interaction, arg):
+        author_id, _, target = arg.partition(":")
+        if interaction.user.id != int(author_id):
+            return await interaction.response.send_message("Run `!help` to get your own menu.", ephemeral=True)
+        if target == "select":
+            target = interaction.data["values"][0]
+        page = int(target) % len(HELP_PAGES)
+        await interaction.response.edit_message(content=HELP_PAGES[page][1], view=self.help_view(int(author_id), page))
 
 def setup(bot):
     bot.add_cog(HelpCog(bot))
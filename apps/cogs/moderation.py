@@ -3,51 +3,177 @@ from nextcord.ext import commands, tasks
 from nextcord.utils import get
 from nextcord import Permissions
 import asyncio
+import datetime
+import re
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from apps.guild_config import GuildConfigStore
+from apps.modlog import LOG_CHANNEL_NAME, ModLogWriter
+from apps.overwrites import OverwritePropagator
+from apps.purge import PurgeFilter, Purger
+from apps.scheduler import UnmuteScheduler
+from apps.spam import RATE, SpamDetector
+
+BANNED_WORD = "banned_word"
+INVITE = "invite"
+# Verdicts are kept for recent messages so other cogs (auto-translate) reuse them
+VERDICT_CACHE_SIZE = 2048
+
+class PurgeFlags(commands.FlagConverter):
+    user: Optional[nextcord.Member] = None
+    match: Optional[str] = None
+    attachments: bool = False
+    links: bool = False
+    newer_than: Optional[int] = None  # hours
+    older_than: Optional[int] = None  # hours
 
 class Moderation(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.auto_mod_enabled = True
-        self.banned_words = ["badword1", "badword2"]
-        self.invite_block = True
-        self.mod_roles = ["Moderator", "Admin"]
+        self.configs = GuildConfigStore()
+        self.modlog = ModLogWriter(bot)
+        self.unmutes = UnmuteScheduler(self.expire_mutes)
+        self.overwrites = OverwritePropagator()
+        self.purger = Purger()
+        self.spam = SpamDetector()
+        self._verdicts = OrderedDict()
+
+    def cog_unload(self):
+        self.modlog.close()
+        self.unmutes.close()
+        self.overwrites.close()
+        self.purger.close()
 
     # -----------------------
     # Helpers
     # -----------------------
     def has_mod_role(self, member: nextcord.Member):
-        return any(role.name in self.mod_roles for role in member.roles)
+        # The owner always passes, so a guild without mod roles can still run addmodrole
+        if member.guild.owner_id == member.id:
+            return True
+        mod_role_ids = self.configs.get_cached(member.guild.id).mod_role_ids
+        # member._roles is the raw role-ID list; member.roles would build and sort Role objects
+        return not mod_role_ids.isdisjoint(member._roles)
+
+    def automod_verdict(self, message):
+        """Why auto-mod removes ``message`` (BANNED_WORD, INVITE, RATE, DUPLICATE) or None.
+
+        Computed once per message: the spam check records the message, so
+        asking again must not count it twice.
+        """
+        if message.id in self._verdicts:
+            return self._verdicts[message.id]
+        verdict = None
+        cfg = self.configs.get_cached(message.guild.id)
+        if cfg.auto_mod_enabled and not self.has_mod_role(message.author):
+            # One pass over the content for banned words and invites
+            result = cfg.matcher.scan(message.content)
+            # Every message feeds the spam windows, even ones removed for other reasons
+            spam = self.spam.check(message.guild.id, message.author.id, message.content)
+            if result.banned_word:
+                verdict = BANNED_WORD
+            elif cfg.invite_block and result.invite:
+                verdict = INVITE
+            else:
+                verdict = spam
+        self._verdicts[message.id] = verdict
+        if len(self._verdicts) > VERDICT_CACHE_SIZE:
+            self._verdicts.popitem(last=False)
+        return verdict
 
     async def log_action(self, ctx_or_interaction, message):
-        log_channel = get(ctx_or_interaction.guild.text_channels, name="mod-log")
-        if log_channel:
-            await log_channel.send(message)
+        await self.modlog.put(ctx_or_interaction.guild, message)
+
+    async def resolve_mod_roles(self, guild):
+        cfg = await self.configs.get(guild.id)
+        if cfg.resolve_mod_roles(guild):
+            await self.configs.save(cfg)
+
+    # -----------------------
+    # Mod role index upkeep
+    # -----------------------
+    @commands.Cog.listener()
+    async def on_ready(self):
+        for guild in self.bot.guilds:
+            await self.resolve_mod_roles(guild)
+        # Reloads pending unmutes; anything that came due while offline fires in the first batch
+        await self.unmutes.start()
+        await self.overwrites.resume(self.bot)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        await self.resolve_mod_roles(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        cfg = await self.configs.get(role.guild.id)
+        if role.id in cfg.mod_role_ids:
+            cfg.mod_role_ids.discard(role.id)
+            await self.configs.save(cfg)
+
+    # -----------------------
+    # Mod-log channel cache upkeep
+    # -----------------------
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        if channel.name == LOG_CHANNEL_NAME:
+            self.modlog.invalidate_channel(channel.guild.id)
+        muted = get(channel.guild.roles, name="Muted")
+        if muted:
+            await self.overwrites.apply_channel(channel, muted)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        self.modlog.invalidate_channel(channel.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        if before.name != after.name:
+            self.modlog.invalidate_channel(after.guild.id)
+
+    @commands.command(name="modlog_stats")
+    async def modlog_stats(self, ctx):
+        if not self.has_mod_role(ctx.author):
+            return await ctx.send("No permission.")
+        stats = self.modlog.stats(ctx.guild.id)
+        await ctx.send(
+            f"Mod-log queue: {stats['depth']}/{stats['capacity']} pending, "
+            f"{stats['sent']} sent in {stats['batches']} batches, {stats['dropped']} dropped."
+        )
 
     # -----------------------
     # Auto-moderation
     # -----------------------
     @commands.Cog.listener()
     async def on_message(self, message):
-        if message.author.bot or not self.auto_mod_enabled:
+        if message.author.bot or message.guild is None:
             return
-        if self.has_mod_role(message.author):
+        verdict = self.automod_verdict(message)
+        if verdict is None:
             return
 
         # Check banned words
-        for word in self.banned_words:
-            if word.lower() in message.content.lower():
-                await message.delete()
-                await message.channel.send(f"{message.author.mention}, watch your language!", delete_after=5)
-                await self.log_action(message, f"Deleted message with banned word from {message.author}")
-                return
+        if verdict == BANNED_WORD:
+            await message.delete()
+            await message.channel.send(f"{message.author.mention}, watch your language!", delete_after=5)
+            await self.log_action(message, f"Deleted message with banned word from {message.author}")
+            return
 
         # Check invites
-        if self.invite_block and ("discord.gg/" in message.content.lower() or "discord.com/invite/" in message.content.lower()):
+        if verdict == INVITE:
             await message.delete()
             await message.channel.send(f"{message.author.mention}, invites are not allowed!", delete_after=5)
             await self.log_action(message, f"Deleted invite from {message.author}")
             return
 
+        # Check message rate / repeated content
+        await message.delete()
+        await message.channel.send(f"{message.author.mention}, slow down and stop spamming!", delete_after=5)
+        reason = "sending messages too fast" if verdict == RATE else "repeating the same message"
+        await self.log_action(message, f"Deleted spam from {message.author} ({reason})")
+
     # -----------------------
     # Auto-mod toggle
     # -----------------------
@@ -57,7 +183,9 @@ class Moderation(commands.Cog):
             return await ctx.send("No permission.")
         if state.lower() not in ["on", "off"]:
             return await ctx.send("Use 'on' or 'off'.")
-        self.auto_mod_enabled = state.lower() == "on"
+        cfg = await self.configs.get(ctx.guild.id)
+        cfg.auto_mod_enabled = state.lower() == "on"
+        await self.configs.save(cfg)
         await ctx.send(f"Auto-moderation is now {state.upper()}.")
         await self.log_action(ctx, f"Auto-moderation toggled {state.upper()} by {ctx.author}.")
 
@@ -67,7 +195,9 @@ class Moderation(commands.Cog):
             return await interaction.response.send_message("No permission.", ephemeral=True)
         if state.lower() not in ["on", "off"]:
             return await interaction.response.send_message("Use 'on' or 'off'.", ephemeral=True)
-        self.auto_mod_enabled = state.lower() == "on"
+        cfg = await self.configs.get(interaction.guild.id)
+        cfg.auto_mod_enabled = state.lower() == "on"
+        await self.configs.save(cfg)
         await interaction.response.send_message(f"Auto-moderation is now {state.upper()}.", ephemeral=True)
         await self.log_action(interaction, f"Auto-moderation toggled {state.upper()} by {interaction.user}.")
 
@@ -78,9 +208,10 @@ class Moderation(commands.Cog):
     async def add_banned_word(self, ctx, *, word: str):
         if not self.has_mod_role(ctx.author):
             return await ctx.send("No permission.")
-        if word.lower() in self.banned_words:
+        cfg = await self.configs.get(ctx.guild.id)
+        if not cfg.add_banned_word(word):
             return await ctx.send("Word already banned.")
-        self.banned_words.append(word.lower())
+        await self.configs.save(cfg)
         await ctx.send(f"Added '{word}' to banned words.")
         await self.log_action(ctx, f"{ctx.author} added '{word}' to banned words.")
 
@@ -88,9 +219,10 @@ class Moderation(commands.Cog):
     async def add_banned_word_slash(self, interaction: nextcord.Interaction, word: str):
         if not self.has_mod_role(interaction.user):
             return await interaction.response.send_message("No permission.", ephemeral=True)
-        if word.lower() in self.banned_words:
+        cfg = await self.configs.get(interaction.guild.id)
+        if not cfg.add_banned_word(word):
             return await interaction.response.send_message("Word already banned.", ephemeral=True)
-        self.banned_words.append(word.lower())
+        await self.configs.save(cfg)
         await interaction.response.send_message(f"Added '{word}' to banned words.", ephemeral=True)
         await self.log_action(interaction, f"{interaction.user} added '{word}' to banned words.")
 
@@ -98,68 +230,74 @@ class Moderation(commands.Cog):
     async def remove_banned_word(self, ctx, *, word: str):
         if not self.has_mod_role(ctx.author):
             return await ctx.send("No permission.")
-        try:
-            self.banned_words.remove(word.lower())
-            await ctx.send(f"Removed '{word}' from banned words.")
-            await self.log_action(ctx, f"{ctx.author} removed '{word}' from banned words.")
-        except ValueError:
-            await ctx.send("Word not found in banned list.")
+        cfg = await self.configs.get(ctx.guild.id)
+        if not cfg.remove_banned_word(word):
+            return await ctx.send("Word not found in banned list.")
+        await self.configs.save(cfg)
+        await ctx.send(f"Removed '{word}' from banned words.")
+        await self.log_action(ctx, f"{ctx.author} removed '{word}' from banned words.")
 
     @nextcord.slash_command(name="removeword", description="Remove a banned word")
     async def remove_banned_word_slash(self, interaction: nextcord.Interaction, word: str):
         if not self.has_mod_role(interaction.user):
             return await interaction.response.send_message("No permission.", ephemeral=True)
-        try:
-            self.banned_words.remove(word.lower())
-            await interaction.response.send_message(f"Removed '{word}' from banned words.", ephemeral=True)
-            await self.log_action(interaction, f"{interaction.user} removed '{word}' from banned words.")
-        except ValueError:
-            await interaction.response.send_message("Word not found in banned list.", ephemeral=True)
+        cfg = await self.configs.get(interaction.guild.id)
+        if not cfg.remove_banned_word(word):
+            return await interaction.response.send_message("Word not found in banned list.", ephemeral=True)
+        await self.configs.save(cfg)
+        await interaction.response.send_message(f"Removed '{word}' from banned words.", ephemeral=True)
+        await self.log_action(interaction, f"{interaction.user} removed '{word}' from banned words.")
 
     # -----------------------
     # Mod roles management
     # -----------------------
     @commands.command(name="addmodrole")
-    async def add_mod_role(self, ctx, *, role_name: str):
+    async def add_mod_role(self, ctx, *, role: nextcord.Role):
         if not self.has_mod_role(ctx.author):
             return await ctx.send("No permission.")
-        if role_name in self.mod_roles:
+        cfg = await self.configs.get(ctx.guild.id)
+        if role.id in cfg.mod_role_ids:
             return await ctx.send("Role already a mod role.")
-        self.mod_roles.append(role_name)
-        await ctx.send(f"Added '{role_name}' as a mod role.")
-        await self.log_action(ctx, f"{ctx.author} added '{role_name}' to mod roles.")
+        cfg.mod_role_ids.add(role.id)
+        await self.configs.save(cfg)
+        await ctx.send(f"Added '{role.name}' as a mod role.")
+        await self.log_action(ctx, f"{ctx.author} added '{role.name}' to mod roles.")
 
     @nextcord.slash_command(name="addmodrole", description="Add a mod role")
-    async def add_mod_role_slash(self, interaction: nextcord.Interaction, role_name: str):
+    async def add_mod_role_slash(self, interaction: nextcord.Interaction, role: nextcord.Role):
         if not self.has_mod_role(interaction.user):
             return await interaction.response.send_message("No permission.", ephemeral=True)
-        if role_name in self.mod_roles:
+        cfg = await self.configs.get(interaction.guild.id)
+        if role.id in cfg.mod_role_ids:
             return await interaction.response.send_message("Role already a mod role.", ephemeral=True)
-        self.mod_roles.append(role_name)
-        await interaction.response.send_message(f"Added '{role_name}' as a mod role.", ephemeral=True)
-        await self.log_action(interaction, f"{interaction.user} added '{role_name}' to mod roles.")
+        cfg.mod_role_ids.add(role.id)
+        await self.configs.save(cfg)
+        await interaction.response.send_message(f"Added '{role.name}' as a mod role.", ephemeral=True)
+        await self.log_action(interaction, f"{interaction.user} added '{role.name}' to mod roles.")
 
     @commands.command(name="removemodrole")
-    async def remove_mod_role(self, ctx, *, role_name: str):
+    async def remove_mod_role(self, ctx, *, role: nextcord.Role):
         if not self.has_mod_role(ctx.author):
             return await ctx.send("No permission.")
-        try:
-            self.mod_roles.remove(role_name)
-            await ctx.send(f"Removed '{role_name}' from mod roles.")
-            await self.log_action(ctx, f"{ctx.author} removed '{role_name}' from mod roles.")
-        except ValueError:
-            await ctx.send("Role not found.")
+        cfg = await self.configs.get(ctx.guild.id)
+        if role.id not in cfg.mod_role_ids:
+            return await ctx.send("Role not found.")
+        cfg.mod_role_ids.discard(role.id)
+        await self.configs.save(cfg)
+        await ctx.send(f"Removed '{role.name}' from mod roles.")
+        await self.log_action(ctx, f"{ctx.author} removed '{role.name}' from mod roles.")
 
     @nextcord.slash_command(name="removemodrole", description="Remove a mod role")
-    async def remove_mod_role_slash(self, interaction: nextcord.Interaction, role_name: str):
+    async def remove_mod_role_slash(self, interaction: nextcord.Interaction, role: nextcord.Role):
         if not self.has_mod_role(interaction.user):
             return await interaction.response.send_message("No permission.", ephemeral=True)
-        try:
-            self.mod_roles.remove(role_name)
-            await interaction.response.send_message(f"Removed '{role_name}' from mod roles.", ephemeral=True)
-            await self.log_action(interaction, f"{interaction.user} removed '{role_name}' from mod roles.")
-        except ValueError:
-            await interaction.response.send_message("Role not found.", ephemeral=True)
+        cfg = await self.configs.get(interaction.guild.id)
+        if role.id not in cfg.mod_role_ids:
+            return await interaction.response.send_message("Role not found.", ephemeral=True)
+        cfg.mod_role_ids.discard(role.id)
+        await self.configs.save(cfg)
+        await interaction.response.send_message(f"Removed '{role.name}' from mod roles.", ephemeral=True)
+        await self.log_action(interaction, f"{interaction.user} removed '{role.name}' from mod roles.")
 
     # -----------------------
     # Kick, Ban, Mute, Unmute
@@ -193,16 +331,58 @@ class Moderation(commands.Cog):
         role = get(ctx.guild.roles, name="Muted")
         if not role:
             role = await ctx.guild.create_role(name="Muted", permissions=Permissions(send_messages=False))
-            for channel in ctx.guild.channels:
-                await channel.set_permissions(role, send_messages=False)
+            await self.setup_muted_overwrites(ctx, role)
         await member.add_roles(role)
         await ctx.send(f"{member} has been muted.")
         await self.log_action(ctx, f"{ctx.author} muted {member}. Duration: {duration}s")
         if duration > 0:
-            await asyncio.sleep(duration)
-            await member.remove_roles(role)
-            await ctx.send(f"{member} has been unmuted.")
-            await self.log_action(ctx, f"{member} auto-unmuted after {duration}s")
+            await self.unmutes.schedule(ctx.guild.id, member.id, role.id, ctx.channel.id, duration)
+        else:
+            await self.unmutes.cancel(ctx.guild.id, member.id)
+
+    async def setup_muted_overwrites(self, ctx, role):
+        status = await ctx.send(f"Setting up the Muted role in {len(ctx.guild.channels)} channels...")
+        last_edit = 0
+
+        async def progress(done, total, failed):
+            nonlocal last_edit
+            if done < total and time.monotonic() - last_edit < 2:
+                return
+            last_edit = time.monotonic()
+            text = f"Muted role overwrites: {done}/{total} channels"
+            if failed:
+                text += f" ({failed} failed, will retry on restart)"
+            await status.edit(content=text)
+
+        # Runs in the background so the mute itself is not held up by large guilds
+        self.overwrites.start(ctx.guild, role, progress)
+
+    async def expire_mutes(self, entries):
+        """Unmute a batch of due entries; returns the ones that failed so the scheduler retries them."""
+        results = await asyncio.gather(*(self.expire_mute(entry) for entry in entries), return_exceptions=True)
+        failed = []
+        for entry, result in zip(entries, results):
+            if isinstance(result, Exception):
+                print(f"Auto-unmute of {entry.user_id} in guild {entry.guild_id} failed, will retry: {result}")
+                failed.append(entry)
+        return failed
+
+    async def expire_mute(self, entry):
+        guild = self.bot.get_guild(entry.guild_id)
+        if guild is None:
+            return
+        member = guild.get_member(entry.user_id)
+        role = guild.get_role(entry.role_id)
+        if member is None or role is None or role not in member.roles:
+            return
+        await member.remove_roles(role)
+        await self.modlog.put(guild, f"{member} auto-unmuted after {entry.duration}s")
+        channel = guild.get_channel(entry.channel_id)
+        if channel:
+            try:
+                await channel.send(f"{member} has been unmuted.")
+            except nextcord.HTTPException:
+                pass  # the unmute itself went through
 
     @commands.command(name="unmute")
     async def unmute(self, ctx, member: nextcord.Member):
@@ -211,6 +391,7 @@ class Moderation(commands.Cog):
         role = get(ctx.guild.roles, name="Muted")
         if role in member.roles:
             await member.remove_roles(role)
+            await self.unmutes.cancel(ctx.guild.id, member.id)
             await ctx.send(f"{member} has been unmuted.")
             await self.log_action(ctx, f"{ctx.author} unmuted {member}.")
         else:
@@ -219,13 +400,53 @@ class Moderation(commands.Cog):
     # -----------------------
     # Purge
     # -----------------------
+    # !purge <amount> [user: @member] [match: regex] [attachments: yes] [links: yes] [newer_than: hours] [older_than: hours]
     @commands.command(name="purge")
-    async def purge(self, ctx, amount: int):
+    async def purge(self, ctx, amount: int, *, flags: PurgeFlags):
+        if not self.has_mod_role(ctx.author):
+            return await ctx.send("No permission.")
+        if self.purger.is_running(ctx.channel.id):
+            return await ctx.send("A purge is already running here. Use `!purge_cancel` to stop it.")
+        now = nextcord.utils.utcnow()
+        try:
+            purge_filter = PurgeFilter(
+                author_id=flags.user.id if flags.user else None,
+                pattern=flags.match,
+                attachments=flags.attachments,
+                links=flags.links,
+                after=now - datetime.timedelta(hours=flags.newer_than) if flags.newer_than else None,
+                before=now - datetime.timedelta(hours=flags.older_than) if flags.older_than else None,
+            )
+        except re.error as e:
+            return await ctx.send(f"Invalid pattern: {e}")
+
+        status = await ctx.send(f"Purging: scanning up to {amount} messages...")
+        purge_filter.skip_ids.add(status.id)
+        last_edit = 0
+
+        async def progress(state):
+            nonlocal last_edit
+            if not state.done and time.monotonic() - last_edit < 2:
+                return
+            last_edit = time.monotonic()
+            text = f"Scanned {state.scanned}, deleted {state.deleted} messages."
+            if state.failed:
+                text += f" {state.failed} failed."
+            if state.done:
+                text = ("Purge cancelled. " if state.cancelled else "Purge finished. ") + text
+                await status.edit(content=text, delete_after=5)
+            else:
+                await status.edit(content=f"Purging... {text}")
+
+        state = await self.purger.start(ctx.channel, amount, purge_filter, progress)
+        await self.log_action(ctx, f"{ctx.author} purged {state.deleted} messages in {ctx.channel}.")
+
+    @commands.command(name="purge_cancel")
+    async def purge_cancel(self, ctx):
         if not self.has_mod_role(ctx.author):
             return await ctx.send("No permission.")
-        deleted = await ctx.channel.purge(limit=amount)
-        await ctx.send(f"Deleted {len(deleted)} messages.", delete_after=5)
-        await self.log_action(ctx, f"{ctx.author} purged {len(deleted)} messages in {ctx.channel}.")
+        if not self.purger.cancel(ctx.channel.id):
+            await ctx.send("No purge is running in this channel.")
 
 def setup(bot):
     bot.add_cog(Moderation(bot))
@@ -2,28 +2,106 @@ import nextcord
 from nextcord.ext import commands
 from nextcord import Interaction, Embed
 from nextcord.utils import get
+import asyncio
 import json
 import os
 
+from apps.components import get_router, stateless_view
+from apps.role_queue import RoleMutationQueue
+from apps.rr_index import ReactionRoleIndex, emoji_key
+from apps.rr_reconcile import ReactionRoleReconciler
+from apps.rr_store import ReactionRoleStore
+
+MAX_BUTTONS = 25
+
 class ReactionRoleCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.file_path = "reaction_roles.json"
-        self.reaction_roles = self.load_data()
+        self.store = ReactionRoleStore()
+        self.migrate_json()
+        self.index = ReactionRoleIndex()
+        self.build_index()
+        self.role_queue = RoleMutationQueue(bot)
+        self.reconciler = ReactionRoleReconciler(bot, self.index, self.store, self.role_queue)
+        self.reconcile_task = None
+        self.router = get_router(bot)
+        self.router.register("rr", self.on_role_button)
+
+    def cog_unload(self):
+        self.router.unregister("rr")
+        self.role_queue.close()
+        if self.reconcile_task:
+            self.reconcile_task.cancel()
 
     # -----------------------
     # Persistence helpers
     # -----------------------
-    def save_data(self):
-        with open(self.file_path, "w") as f:
-            json.dump(self.reaction_roles, f)
-
     def load_data(self):
         if os.path.exists(self.file_path):
             with open(self.file_path, "r") as f:
                 return json.load(f)
         return {}
 
+    def migrate_json(self):
+        # One-time import of the old reaction_roles.json into the SQLite store
+        data = self.load_data()
+        if data:
+            self.store.import_json(data)
+            os.replace(self.file_path, self.file_path + ".migrated")
+
+    def build_index(self):
+        resolved, legacy = self.store.load()
+        for message_id, roles in resolved.items():
+            self.index.add_message(message_id, roles)
+        for message_id, names in legacy.items():
+            # Older entries map emoji -> role name
+            self.index.add_legacy(message_id, names)
+
+    async def role_for(self, payload):
+        if payload.guild_id is None:
+            return None
+        if self.index.has_pending(payload.message_id):
+            guild = self.bot.get_guild(payload.guild_id)
+            if guild is None:
+                return None
+            resolved = self.index.resolve(payload.message_id, guild)
+            await self.store.save_message(payload.message_id, guild.id, resolved, payload.channel_id)
+        return self.index.lookup(payload.message_id, emoji_key(payload.emoji))
+
+    # -----------------------
+    # Role buttons
+    # -----------------------
+    def role_view(self, mappings):
+        return stateless_view(*(
+            nextcord.ui.Button(label=role.name, emoji=emoji, custom_id=f"rr:{role.id}")
+            for emoji, role in mappings.items()
+        ))
+
+    @staticmethod
+    def is_role_menu(message):
+        return any(
+            (getattr(child, "custom_id", None) or "").startswith("rr:")
+            for row in message.components
+            for child in getattr(row, "children", ())
+        )
+
+    async def on_role_button(self, interaction, arg):
+        guild = interaction.guild
+        role = guild.get_role(int(arg)) if guild else None
+        if role is None:
+            return await interaction.response.send_message("That role no longer exists.", ephemeral=True)
+        member = interaction.user
+        has_role = self.role_queue.pending_state(guild.id, member.id, role.id)
+        if has_role is None:
+            has_role = member.get_role(role.id) is not None
+        if has_role:
+            self.role_queue.remove(guild.id, member.id, role.id)
+            await interaction.response.send_message(f"Removed {role.name}.", ephemeral=True)
+        else:
+            self.role_queue.add(guild.id, member.id, role.id)
+            await interaction.response.send_message(f"Added {role.name}.", ephemeral=True)
+
     # -----------------------
     # Create reaction role (prefix)
     # -----------------------
@@ -41,17 +119,15 @@ class ReactionRoleCog(commands.Cog):
                 if not role:
                     await ctx.send(f"Role '{role_name}' not found.")
                     return
-                mappings[emoji] = role_name
+                mappings[emoji] = role
                 description_lines.append(f"{emoji} → {role_name}")
 
-            embed = Embed(title="Reaction Roles", description="\n".join(description_lines))
-            message = await ctx.send(embed=embed)
+            if len(mappings) > MAX_BUTTONS:
+                return await ctx.send(f"At most {MAX_BUTTONS} roles per message.")
 
-            for emoji in mappings:
-                await message.add_reaction(emoji)
+            embed = Embed(title="Reaction Roles", description="\n".join(description_lines))
+            await ctx.send(embed=embed, view=self.role_view(mappings))
 
-            self.reaction_roles[str(message.id)] = mappings
-            self.save_data()
             await ctx.send("Reaction role message created successfully!")
 
         except Exception as e:
@@ -74,17 +150,15 @@ class ReactionRoleCog(commands.Cog):
                 role = get(guild.roles, name=role_name)
                 if not role:
                     return await interaction.response.send_message(f"Role '{role_name}' not found.", ephemeral=True)
-                mappings[emoji] = role_name
+                mappings[emoji] = role
                 description_lines.append(f"{emoji} → {role_name}")
 
-            embed = Embed(title="Reaction Roles", description="\n".join(description_lines))
-            message = await interaction.channel.send(embed=embed)
+            if len(mappings) > MAX_BUTTONS:
+                return await interaction.response.send_message(f"At most {MAX_BUTTONS} roles per message.", ephemeral=True)
 
-            for emoji in mappings:
-                await message.add_reaction(emoji)
+            embed = Embed(title="Reaction Roles", description="\n".join(description_lines))
+            await interaction.channel.send(embed=embed, view=self.role_view(mappings))
 
-            self.reaction_roles[str(message.id)] = mappings
-            self.save_data()
             await interaction.response.send_message("Reaction role message created successfully!", ephemeral=True)
 
         except Exception as e:
@@ -95,14 +169,7 @@ class ReactionRoleCog(commands.Cog):
     # -----------------------
     @commands.command(name="delete_rr")
     async def delete_reaction_role(self, ctx, message_id: int):
-        if str(message_id) in self.reaction_roles:
-            try:
-                msg = await ctx.channel.fetch_message(message_id)
-                await msg.delete()
-            except Exception:
-                pass  # message may already be deleted
-            del self.reaction_roles[str(message_id)]
-            self.save_data()
+        if await self.delete_role_message(ctx.channel, message_id):
             await ctx.send(f"Deleted reaction role message `{message_id}` and removed from tracking.")
         else:
             await ctx.send("Message ID not found in reaction role list.")
@@ -112,48 +179,73 @@ class ReactionRoleCog(commands.Cog):
     # -----------------------
     @nextcord.slash_command(name="delete_rr", description="Delete a reaction-role message")
     async def delete_reaction_role_slash(self, interaction: Interaction, message_id: int):
-        if str(message_id) in self.reaction_roles:
-            try:
-                msg = await interaction.channel.fetch_message(message_id)
-                await msg.delete()
-            except Exception:
-                pass
-            del self.reaction_roles[str(message_id)]
-            self.save_data()
+        if await self.delete_role_message(interaction.channel, message_id):
             await interaction.response.send_message(f"Deleted reaction role message `{message_id}` and removed from tracking.", ephemeral=True)
         else:
             await interaction.response.send_message("Message ID not found in reaction role list.", ephemeral=True)
 
+    async def delete_role_message(self, channel, message_id):
+        if message_id in self.index:
+            try:
+                msg = await channel.fetch_message(message_id)
+                await msg.delete()
+            except Exception:
+                pass  # message may already be deleted
+            self.index.remove_message(message_id)
+            await self.store.delete_message(message_id)
+            return True
+        # Button menus are not tracked; the message itself is the record
+        try:
+            msg = await channel.fetch_message(message_id)
+        except nextcord.HTTPException:
+            return False
+        if msg.author.id != self.bot.user.id or not self.is_role_menu(msg):
+            return False
+        await msg.delete()
+        return True
+
     # -----------------------
     # Listeners for role add/remove
     # -----------------------
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # Catch up on reactions made while offline without holding up readiness
+        if self.reconcile_task is None:
+            self.reconcile_task = asyncio.create_task(self.reconciler.run())
+
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, payload):
         if payload.user_id == self.bot.user.id:
             return
-        if str(payload.message_id) in self.reaction_roles:
-            emoji_to_role = self.reaction_roles[str(payload.message_id)]
-            emoji_str = str(payload.emoji)
-            if emoji_str in emoji_to_role:
-                guild = self.bot.get_guild(payload.guild_id)
-                role = get(guild.roles, name=emoji_to_role[emoji_str])
-                member = guild.get_member(payload.user_id)
-                if role and member:
-                    await member.add_roles(role)
+        role_id = await self.role_for(payload)
+        if role_id is None:
+            return
+        self.role_queue.add(payload.guild_id, payload.user_id, role_id)
+        await self.store.record_grant(payload.guild_id, payload.user_id, role_id)
 
     @commands.Cog.listener()
     async def on_raw_reaction_remove(self, payload):
         if payload.user_id == self.bot.user.id:
             return
-        if str(payload.message_id) in self.reaction_roles:
-            emoji_to_role = self.reaction_roles[str(payload.message_id)]
-            emoji_str = str(payload.emoji)
-            if emoji_str in emoji_to_role:
-                guild = self.bot.get_guild(payload.guild_id)
-                role = get(guild.roles, name=emoji_to_role[emoji_str])
-                member = guild.get_member(payload.user_id)
-                if role and member:
-                    await member.remove_roles(role)
+        role_id = await self.role_for(payload)
+        if role_id is None:
+            return
+        self.role_queue.remove(payload.guild_id, payload.user_id, role_id)
+        await self.store.record_grant(payload.guild_id, payload.user_id, role_id, granted=False)
+
+    @commands.command(name="rr_stats")
+    async def rr_stats(self, ctx):
+        stats = self.role_queue.stats()
+        await ctx.send(
+            f"Reaction-role updates: {stats['requested']} requested, {stats['edits']} member edits, "
+            f"{stats['collapsed']} collapsed ({stats['noops']} cancelled out), {stats['failed']} failed, "
+            f"{stats['pending']} pending."
+        )
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        # Index is keyed by role ID, so renames need no update
+        self.index.remove_role(role.id)
 
 def setup(bot):
     bot.add_cog(ReactionRoleCog(bot))
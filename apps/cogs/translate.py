@@ -0,0 +1,120 @@
+import re
+
+import nextcord
+from nextcord.ext import commands
+from nextcord import Interaction
+
+from apps.auto_translate import AutoTranslator, TranslateChannelStore
+from apps.translation import get_translator
+from config import TRANSLATE_BUDGET_PER_MINUTE
+
+LANGUAGE = re.compile(r"^[a-z]{2,3}(-[a-z]{2,4})?$")
+MAX_TARGETS = 5
+
+class AutoTranslateCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.translator = get_translator()
+        self.channels = TranslateChannelStore()
+        self.auto = AutoTranslator(bot, self.translator, self.channels,
+                                   budget_per_minute=TRANSLATE_BUDGET_PER_MINUTE)
+
+    def cog_unload(self):
+        self.auto.close()
+
+    # -----------------------
+    # Helpers
+    # -----------------------
+    @staticmethod
+    def parse_targets(text):
+        targets = list(dict.fromkeys(t.lower() for t in re.split(r"[\s,]+", text) if t))
+        if not targets or len(targets) > MAX_TARGETS or not all(LANGUAGE.match(t) for t in targets):
+            return None
+        return targets
+
+    async def enable(self, channel, text):
+        targets = self.parse_targets(text)
+        if targets is None:
+            return f"Give 1-{MAX_TARGETS} language codes, e.g. `en fr de`."
+        if not self.translator.available:
+            return "No translator is configured."
+        await self.channels.set(channel.guild.id, channel.id, targets)
+        return f"Messages in {channel.mention} will be translated to {', '.join(t.upper() for t in targets)}."
+
+    async def disable(self, channel):
+        self.auto.forget_channel(channel.id)
+        if await self.channels.remove(channel.id):
+            return f"Auto-translate disabled in {channel.mention}."
+        return "Auto-translate is not enabled here."
+
+    def stats_text(self, guild):
+        stats = self.auto.stats(guild.id)
+        cache = self.translator.stats.snapshot()
+        channels = self.channels.for_guild(guild)
+        lines = [f"<#{cid}> → {', '.join(t.upper() for t in targets)}" for cid, targets in channels.items()]
+        hit_ratio = f"{cache['hit_ratio']:.0%}" if cache["hit_ratio"] is not None else "n/a"
+        lines.append(
+            f"Translated {stats['translated']} messages in {stats['batches']} batches, "
+            f"dropped {stats['dropped']}, budget left {stats['budget']} chars. "
+            f"Cache hit ratio {hit_ratio}, provider p50 {cache['provider_latency_ms']['p50']} ms."
+        )
+        return "\n".join(lines)
+
+    # -----------------------
+    # Listeners
+    # -----------------------
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        if message.author.bot or message.webhook_id or message.guild is None or not message.content:
+            return
+        if self.channels.targets(message.channel.id) is None:
+            return
+        # Never repost what auto-mod deletes (banned words, invites, spam)
+        moderation = self.bot.get_cog("Moderation")
+        if moderation is not None and moderation.automod_verdict(message) is not None:
+            return
+        prefixes = await self.bot.get_prefix(message)
+        if message.content.startswith(tuple([prefixes] if isinstance(prefixes, str) else prefixes)):
+            return
+        self.auto.put(message)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        self.auto.forget_channel(channel.id)
+        await self.channels.remove(channel.id)
+
+    # -----------------------
+    # Commands
+    # -----------------------
+    @commands.command(name="autotranslate")
+    async def autotranslate(self, ctx, *, languages: str = ""):
+        if not ctx.author.guild_permissions.manage_guild:
+            return await ctx.send("No permission.")
+        await ctx.send(await self.enable(ctx.channel, languages))
+
+    @nextcord.slash_command(name="autotranslate", description="Auto-translate this channel into other languages")
+    async def autotranslate_slash(self, interaction: Interaction, languages: str):
+        if not interaction.user.guild_permissions.manage_guild:
+            return await interaction.response.send_message("No permission.", ephemeral=True)
+        await interaction.response.send_message(await self.enable(interaction.channel, languages))
+
+    @commands.command(name="autotranslate_off")
+    async def autotranslate_off(self, ctx):
+        if not ctx.author.guild_permissions.manage_guild:
+            return await ctx.send("No permission.")
+        await ctx.send(await self.disable(ctx.channel))
+
+    @nextcord.slash_command(name="autotranslate_off", description="Stop auto-translating this channel")
+    async def autotranslate_off_slash(self, interaction: Interaction):
+        if not interaction.user.guild_permissions.manage_guild:
+            return await interaction.response.send_message("No permission.", ephemeral=True)
+        await interaction.response.send_message(await self.disable(interaction.channel))
+
+    @commands.command(name="autotranslate_stats")
+    async def autotranslate_stats(self, ctx):
+        if not ctx.author.guild_permissions.manage_guild:
+            return await ctx.send("No permission.")
+        await ctx.send(self.stats_text(ctx.guild))
+
+def setup(bot):
+    bot.add_cog(AutoTranslateCog(bot))
@@ -1 +1,103 @@
+import nextcord
+from nextcord.ext import commands, tasks
+from nextcord import Interaction, Embed
+from typing import Optional
 
+from apps.leveling import XPEngine, level_for, xp_for_level
+
+class XPCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.engine = XPEngine()
+
+    def cog_unload(self):
+        # after_loop writes out whatever is still pending
+        self.flush_loop.cancel()
+
+    # -----------------------
+    # Persistence
+    # -----------------------
+    @commands.Cog.listener()
+    async def on_ready(self):
+        if not self.flush_loop.is_running():
+            self.flush_loop.start()
+
+    @tasks.loop(seconds=30)
+    async def flush_loop(self):
+        await self.engine.flush()
+
+    @flush_loop.after_loop
+    async def final_flush(self):
+        await self.engine.flush()
+
+    # -----------------------
+    # Helpers
+    # -----------------------
+    def level_text(self, guild_id, member):
+        xp = self.engine.get_xp(guild_id, member.id)
+        level = level_for(xp)
+        rank = self.engine.rank(guild_id, member.id)
+        rank_text = f"#{rank}" if rank else "unranked"
+        return f"**{member.display_name}** is level {level} ({xp}/{xp_for_level(level + 1)} XP), rank {rank_text}."
+
+    def leaderboard_embed(self, guild):
+        lines = []
+        for position, (user_id, xp) in enumerate(self.engine.top(guild.id, 10), start=1):
+            member = guild.get_member(user_id)
+            name = member.display_name if member else f"User {user_id}"
+            lines.append(f"**{position}.** {name} — level {level_for(xp)} ({xp} XP)")
+        return Embed(title=f"{guild.name} Leaderboard", description="\n".join(lines) or "No XP earned yet.")
+
+    # -----------------------
+    # XP accrual
+    # -----------------------
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        if message.author.bot or message.guild is None:
+            return
+        new_level = self.engine.award(message.guild.id, message.author.id)
+        if new_level:
+            await message.channel.send(f"🎉 {message.author.mention} reached level {new_level}!")
+
+    # -----------------------
+    # Level / leaderboard
+    # -----------------------
+    @commands.command(name="level")
+    async def level(self, ctx, member: Optional[nextcord.Member] = None):
+        await ctx.send(self.level_text(ctx.guild.id, member or ctx.author))
+
+    @nextcord.slash_command(name="level", description="Show a member's level")
+    async def level_slash(self, interaction: Interaction, member: Optional[nextcord.Member] = None):
+        await interaction.response.send_message(self.level_text(interaction.guild.id, member or interaction.user))
+
+    @commands.command(name="leaderboard")
+    async def leaderboard(self, ctx):
+        await ctx.send(embed=self.leaderboard_embed(ctx.guild))
+
+    @nextcord.slash_command(name="leaderboard", description="Show the XP leaderboard")
+    async def leaderboard_slash(self, interaction: Interaction):
+        await interaction.response.send_message(embed=self.leaderboard_embed(interaction.guild))
+
+    # -----------------------
+    # XP rate
+    # -----------------------
+    @commands.command(name="set_xp_rate")
+    async def set_xp_rate(self, ctx, rate: float):
+        if not ctx.author.guild_permissions.manage_guild:
+            return await ctx.send("No permission.")
+        if rate < 0 or rate > 10:
+            return await ctx.send("Rate must be between 0 and 10.")
+        await self.engine.set_rate(ctx.guild.id, rate)
+        await ctx.send(f"XP rate set to {rate}x.")
+
+    @nextcord.slash_command(name="set_xp_rate", description="Set the XP multiplier for this server")
+    async def set_xp_rate_slash(self, interaction: Interaction, rate: float):
+        if not interaction.user.guild_permissions.manage_guild:
+            return await interaction.response.send_message("No permission.", ephemeral=True)
+        if rate < 0 or rate > 10:
+            return await interaction.response.send_message("Rate must be between 0 and 10.", ephemeral=True)
+        await self.engine.set_rate(interaction.guild.id, rate)
+        await interaction.response.send_message(f"XP rate set to {rate}x.", ephemeral=True)
+
+def setup(bot):
+    bot.add_cog(XPCog(bot))
@@ -0,0 +1,49 @@
+import nextcord
+
+
+class ComponentRouter:
+    """Routes component interactions to handlers by custom_id prefix.
+
+    custom_ids have the form ``"<prefix>:<arg>"``. Handlers are registered
+    once per cog and a single ``on_interaction`` listener dispatches every
+    click or selection, so messages carry all their own state and no view
+    object or waiter is kept alive per message. This keeps working across
+    restarts.
+    """
+
+    def __init__(self):
+        self._handlers = {}
+        # Optional callable(prefix) -> bool that loads the owner of an unknown prefix
+        self.loader = None
+
+    def register(self, prefix, handler):
+        self._handlers[prefix] = handler
+
+    def unregister(self, prefix):
+        self._handlers.pop(prefix, None)
+
+    async def dispatch(self, interaction):
+        if interaction.type != nextcord.InteractionType.component:
+            return
+        prefix, _, arg = interaction.data.get("custom_id", "").partition(":")
+        handler = self._handlers.get(prefix)
+        if handler is None and self.loader and self.loader(prefix):
+            handler = self._handlers.get(prefix)
+        if handler:
+            await handler(interaction, arg)
+
+
+def get_router(bot):
+    router = getattr(bot, "component_router", None)
+    if router is None:
+        router = bot.component_router = ComponentRouter()
+        bot.add_listener(router.dispatch, "on_interaction")
+    return router
+
+
+def stateless_view(*items):
+    """A view that is sent once and never stored in the client's view store."""
+    view = nextcord.ui.View(timeout=None, prevent_update=False)
+    for item in items:
+        view.add_item(item)
+    return view
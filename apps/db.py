@@ -0,0 +1,62 @@
+import asyncio
+import sqlite3
+import threading
+
+from config import DATABASE_PATH
+
+
+class Database:
+    """Shared SQLite connection (WAL mode) for the bot's local state.
+
+    Sync methods are safe to call from any thread; the async wrappers run
+    them in a worker thread so the event loop never blocks on disk.
+    """
+
+    def __init__(self, path=DATABASE_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.Lock()
+
+    def execute(self, sql, params=()):
+        with self._lock, self._conn:
+            return self._conn.execute(sql, params).fetchall()
+
+    def executemany(self, sql, rows):
+        with self._lock, self._conn:
+            self._conn.executemany(sql, rows)
+
+    def executebatch(self, statements):
+        """Run [(sql, params), ...] in a single transaction."""
+        with self._lock, self._conn:
+            for sql, params in statements:
+                self._conn.execute(sql, params)
+
+    def executescript(self, script):
+        with self._lock, self._conn:
+            self._conn.executescript(script)
+
+    async def run(self, sql, params=()):
+        return await asyncio.to_thread(self.execute, sql, params)
+
+    async def run_many(self, sql, rows):
+        return await asyncio.to_thread(self.executemany, sql, rows)
+
+    async def run_batch(self, statements):
+        return await asyncio.to_thread(self.executebatch, statements)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_database = None
+
+
+def get_database():
+    global _database
+    if _database is None:
+        _database = Database()
+    return _database
@@ -0,0 +1,135 @@
+import json
+
+from apps.db import get_database
+from apps.matcher import PatternMatcher
+from apps.sharding import owns_guild
+
+DEFAULT_BANNED_WORDS = ["badword1", "badword2"]
+DEFAULT_MOD_ROLES = ["Moderator", "Admin"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS guild_config (
+    guild_id INTEGER PRIMARY KEY,
+    auto_mod_enabled INTEGER NOT NULL,
+    invite_block INTEGER NOT NULL,
+    banned_words TEXT NOT NULL,
+    mod_roles TEXT NOT NULL,
+    mod_role_ids TEXT NOT NULL DEFAULT '[]'
+)
+"""
+
+
+class GuildConfig:
+    def __init__(self, guild_id, auto_mod_enabled=True, invite_block=True, banned_words=None, mod_roles=None,
+                 mod_role_ids=None):
+        self.guild_id = guild_id
+        self.auto_mod_enabled = auto_mod_enabled
+        self.invite_block = invite_block
+        self.banned_words = list(DEFAULT_BANNED_WORDS if banned_words is None else banned_words)
+        # Role names still waiting to be resolved to IDs (defaults and legacy rows);
+        # mod checks only ever look at mod_role_ids.
+        self.mod_roles = list(DEFAULT_MOD_ROLES if mod_roles is None else mod_roles)
+        self.mod_role_ids = set(mod_role_ids or ())
+        self.matcher = PatternMatcher(self.banned_words)
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(
+            row["guild_id"],
+            auto_mod_enabled=bool(row["auto_mod_enabled"]),
+            invite_block=bool(row["invite_block"]),
+            banned_words=json.loads(row["banned_words"]),
+            mod_roles=json.loads(row["mod_roles"]),
+            mod_role_ids=json.loads(row["mod_role_ids"]),
+        )
+
+    def to_row(self):
+        return (
+            self.guild_id,
+            int(self.auto_mod_enabled),
+            int(self.invite_block),
+            json.dumps(self.banned_words),
+            json.dumps(self.mod_roles),
+            json.dumps(sorted(self.mod_role_ids)),
+        )
+
+    def resolve_mod_roles(self, guild):
+        """Turn pending role names into IDs once; returns True if anything changed.
+
+        Names with no matching role are dropped rather than kept pending, so
+        creating or renaming a role later never grants mod rights by name.
+        """
+        if not self.mod_roles:
+            return False
+        by_name = {role.name: role.id for role in guild.roles}
+        for name in self.mod_roles:
+            if name in by_name:
+                self.mod_role_ids.add(by_name[name])
+        self.mod_roles = []
+        return True
+
+    def add_banned_word(self, word):
+        word = word.lower()
+        if word in self.banned_words or not self.matcher.add(word):
+            return False
+        self.banned_words.append(word)
+        return True
+
+    def remove_banned_word(self, word):
+        word = word.lower()
+        if word not in self.banned_words:
+            return False
+        self.banned_words.remove(word)
+        self.matcher.remove(word)
+        return True
+
+
+class GuildConfigStore:
+    """Per-guild automod config with a read-through cache keyed by guild_id.
+
+    Every persisted row is loaded into the cache at startup, so the message
+    hot path can use ``get_cached`` without ever touching SQLite. Commands
+    use ``get``/``save``, which only read or write the one guild's row.
+    """
+
+    def __init__(self, db=None):
+        self.db = db or get_database()
+        self.db.executescript(SCHEMA)
+        columns = {row["name"] for row in self.db.execute("PRAGMA table_info(guild_config)")}
+        if "mod_role_ids" not in columns:
+            self.db.execute("ALTER TABLE guild_config ADD COLUMN mod_role_ids TEXT NOT NULL DEFAULT '[]'")
+        self._cache = {}
+        self.warm()
+
+    def warm(self):
+        for row in self.db.execute("SELECT * FROM guild_config"):
+            if owns_guild(row["guild_id"]):
+                self._cache[row["guild_id"]] = GuildConfig.from_row(row)
+
+    def get_cached(self, guild_id):
+        cfg = self._cache.get(guild_id)
+        if cfg is None:
+            cfg = self._cache[guild_id] = GuildConfig(guild_id)
+        return cfg
+
+    async def get(self, guild_id):
+        cfg = self._cache.get(guild_id)
+        if cfg is not None:
+            return cfg
+        rows = await self.db.run("SELECT * FROM guild_config WHERE guild_id = ?", (guild_id,))
+        cfg = GuildConfig.from_row(rows[0]) if rows else GuildConfig(guild_id)
+        return self._cache.setdefault(guild_id, cfg)
+
+    async def save(self, cfg):
+        self._cache[cfg.guild_id] = cfg
+        await self.db.run(
+            "INSERT INTO guild_config (guild_id, auto_mod_enabled, invite_block, banned_words, mod_roles, mod_role_ids) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(guild_id) DO UPDATE SET auto_mod_enabled = excluded.auto_mod_enabled, "
+            "invite_block = excluded.invite_block, banned_words = excluded.banned_words, "
+            "mod_roles = excluded.mod_roles, mod_role_ids = excluded.mod_role_ids",
+            cfg.to_row(),
+        )
+
+    def invalidate(self, guild_id):
+        self._cache.pop(guild_id, None)
@@ -0,0 +1,156 @@
+import math
+import random
+import time
+
+from apps.db import get_database
+from apps.ranking import RankedSet
+from apps.sharding import owns_guild
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS xp (
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    xp INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, user_id)
+);
+CREATE TABLE IF NOT EXISTS xp_settings (
+    guild_id INTEGER PRIMARY KEY,
+    rate REAL NOT NULL
+);
+"""
+
+XP_MIN, XP_MAX = 15, 25
+
+
+def level_for(xp):
+    # Level L starts at 100 * L^2 total XP
+    return math.isqrt(xp // 100)
+
+
+def xp_for_level(level):
+    return 100 * level * level
+
+
+class _GuildBoard:
+    __slots__ = ("xp", "ranked", "rate")
+
+    def __init__(self, rate=1.0):
+        self.xp = {}
+        # keys are (-xp, user_id) so rank 0 is the top of the leaderboard
+        self.ranked = RankedSet()
+        self.rate = rate
+
+
+class XPEngine:
+    """In-memory XP accrual with periodic batched persistence.
+
+    Messages award XP at most once per ``cooldown`` seconds per member.
+    Totals and a per-guild ranked set are updated in memory, and changed
+    rows are written back by ``flush`` as one batched upsert. The hot path
+    never touches SQLite.
+    """
+
+    def __init__(self, cooldown=60, db=None):
+        self.cooldown = cooldown
+        self.db = db or get_database()
+        self.db.executescript(SCHEMA)
+        self._boards = {}
+        self._last_award = {}
+        self._dirty = set()
+        self.load()
+
+    def load(self):
+        for row in self.db.execute("SELECT guild_id, rate FROM xp_settings"):
+            if owns_guild(row["guild_id"]):
+                self._board(row["guild_id"]).rate = row["rate"]
+        for row in self.db.execute("SELECT guild_id, user_id, xp FROM xp"):
+            if not owns_guild(row["guild_id"]):
+                continue
+            board = self._board(row["guild_id"])
+            board.xp[row["user_id"]] = row["xp"]
+            board.ranked.add((-row["xp"], row["user_id"]))
+
+    def _board(self, guild_id):
+        board = self._boards.get(guild_id)
+        if board is None:
+            board = self._boards[guild_id] = _GuildBoard()
+        return board
+
+    # -----------------------
+    # Hot path
+    # -----------------------
+    def award(self, guild_id, user_id, now=None):
+        """Award message XP; returns the new level on level-up, else None."""
+        now = time.monotonic() if now is None else now
+        key = (guild_id, user_id)
+        last = self._last_award.get(key)
+        if last is not None and now - last < self.cooldown:
+            return None
+        self._last_award[key] = now
+        board = self._board(guild_id)
+        gained = round(random.randint(XP_MIN, XP_MAX) * board.rate)
+        if gained <= 0:
+            return None
+        old = board.xp.get(user_id, 0)
+        self.set_xp(guild_id, user_id, old + gained)
+        new_level = level_for(old + gained)
+        return new_level if new_level > level_for(old) else None
+
+    def set_xp(self, guild_id, user_id, xp):
+        board = self._board(guild_id)
+        old = board.xp.get(user_id)
+        if old is not None:
+            board.ranked.remove((-old, user_id))
+        board.xp[user_id] = xp
+        board.ranked.add((-xp, user_id))
+        self._dirty.add((guild_id, user_id))
+
+    # -----------------------
+    # Queries
+    # -----------------------
+    def get_xp(self, guild_id, user_id):
+        return self._board(guild_id).xp.get(user_id, 0)
+
+    def rank(self, guild_id, user_id):
+        """1-based leaderboard position, or None if the member has no XP."""
+        board = self._board(guild_id)
+        xp = board.xp.get(user_id)
+        if xp is None:
+            return None
+        return board.ranked.rank((-xp, user_id)) + 1
+
+    def top(self, guild_id, n=10):
+        return [(user_id, -neg_xp) for neg_xp, user_id in self._board(guild_id).ranked.first(n)]
+
+    def get_rate(self, guild_id):
+        return self._board(guild_id).rate
+
+    async def set_rate(self, guild_id, rate):
+        self._board(guild_id).rate = rate
+        await self.db.run(
+            "INSERT INTO xp_settings (guild_id, rate) VALUES (?, ?) "
+            "ON CONFLICT(guild_id) DO UPDATE SET rate = excluded.rate",
+            (guild_id, rate),
+        )
+
+    # -----------------------
+    # Persistence
+    # -----------------------
+    async def flush(self):
+        if not self._dirty:
+            return 0
+        dirty, self._dirty = self._dirty, set()
+        rows = [(guild_id, user_id, self._boards[guild_id].xp[user_id]) for guild_id, user_id in dirty]
+        try:
+            await self.db.run_many(
+                "INSERT INTO xp (guild_id, user_id, xp) VALUES (?, ?, ?) "
+                "ON CONFLICT(guild_id, user_id) DO UPDATE SET xp = excluded.xp",
+                rows,
+            )
+        except Exception:
+            self._dirty |= dirty  # retry on the next flush
+            raise
+        # Cooldown stamps older than the cooldown no longer matter
+        cutoff = time.monotonic() - self.cooldown
+        self._last_award = {key: ts for key, ts in self._last_award.items() if ts > cutoff}
+        return len(rows)
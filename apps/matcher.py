@@ -0,0 +1,143 @@
+from collections import deque
+
+BANNED = "banned"
+INVITE = "invite"
+
+INVITE_PATTERNS = ("discord.gg/", "discord.com/invite/")
+
+
+class ScanResult:
+    __slots__ = ("banned_word", "invite")
+
+    def __init__(self, banned_word=None, invite=False):
+        self.banned_word = banned_word
+        self.invite = invite
+
+    def __bool__(self):
+        return self.banned_word is not None or self.invite
+
+
+class PatternMatcher:
+    """Aho-Corasick automaton over banned words and invite patterns.
+
+    Patterns are keyed by (kind, text), so a banned word equal to an invite
+    pattern is a separate entry and removing it leaves invite blocking on.
+    Words are inserted into the trie as they are added; failure links are
+    recomputed lazily on the next scan after any change, so a burst of
+    addword/removeword calls only pays for one link pass.
+    """
+
+    def __init__(self, words=(), invite_patterns=INVITE_PATTERNS):
+        self._reset()
+        for pattern in invite_patterns:
+            self.add(pattern, INVITE)
+        for word in words:
+            self.add(word)
+
+    def _reset(self):
+        self._goto = [{}]
+        self._fail = [0]
+        # kinds ending at each node; empty for interior nodes
+        self._kind = [set()]
+        self._pattern = [None]
+        self._dict_link = [0]
+        self._patterns = set()
+        self._dead = 0
+        self._dirty = False
+
+    def __contains__(self, word):
+        return (BANNED, word.lower()) in self._patterns
+
+    def __len__(self):
+        return len(self._patterns)
+
+    # -----------------------
+    # Mutation
+    # -----------------------
+    def add(self, word, kind=BANNED):
+        word = word.lower()
+        if not word or (kind, word) in self._patterns:
+            return False
+        state = 0
+        for ch in word:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._kind.append(set())
+                self._pattern.append(None)
+                self._dict_link.append(0)
+                self._goto[state][ch] = nxt
+            state = nxt
+        self._kind[state].add(kind)
+        self._pattern[state] = word
+        self._patterns.add((kind, word))
+        self._dirty = True
+        return True
+
+    def remove(self, word, kind=BANNED):
+        word = word.lower()
+        if (kind, word) not in self._patterns:
+            return False
+        state = 0
+        for ch in word:
+            state = self._goto[state][ch]
+        self._kind[state].discard(kind)
+        if not self._kind[state]:
+            self._pattern[state] = None
+        self._patterns.discard((kind, word))
+        self._dead += 1
+        self._dirty = True
+        # Removed words leave their trie nodes behind; compact once they
+        # outnumber the live patterns.
+        if self._dead > len(self._patterns):
+            patterns = list(self._patterns)
+            self._reset()
+            for kind, pattern in patterns:
+                self.add(pattern, kind)
+        return True
+
+    def _build_links(self):
+        goto, fail, kind, dict_link = self._goto, self._fail, self._kind, self._dict_link
+        queue = deque()
+        for child in goto[0].values():
+            fail[child] = 0
+            dict_link[child] = 0
+            queue.append(child)
+        while queue:
+            state = queue.popleft()
+            for ch, child in goto[state].items():
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                f = goto[f].get(ch, 0)
+                fail[child] = f
+                dict_link[child] = f if kind[f] else dict_link[f]
+                queue.append(child)
+        self._dirty = False
+
+    # -----------------------
+    # Scanning
+    # -----------------------
+    def scan(self, text):
+        """Single pass over ``text``; stops at the first banned word."""
+        if self._dirty:
+            self._build_links()
+        goto, fail, kind, pattern, dict_link = (
+            self._goto, self._fail, self._kind, self._pattern, self._dict_link
+        )
+        result = ScanResult()
+        state = 0
+        for ch in text.lower():
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            node = state if kind[state] else dict_link[state]
+            while node:
+                if BANNED in kind[node]:
+                    result.banned_word = pattern[node]
+                    return result
+                result.invite = True
+                node = dict_link[node]
+        return result
@@ -0,0 +1,122 @@
+import asyncio
+import time
+from collections import Counter
+
+import nextcord
+from nextcord.utils import get
+
+LOG_CHANNEL_NAME = "mod-log"
+EMBED_LIMIT = 4096
+
+
+class ModLogWriter:
+    """Per-guild queue that coalesces mod-log entries into batched sends.
+
+    Each guild gets a bounded queue and one worker task. The worker flushes
+    whatever has accumulated every ``flush_interval`` seconds or as soon as
+    ``batch_size`` entries are waiting. ``put`` applies backpressure while
+    the buffer is full and drops the entry after ``put_timeout`` seconds.
+    """
+
+    def __init__(self, bot, flush_interval=2.0, batch_size=20, max_buffer=500, put_timeout=1.0):
+        self.bot = bot
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_buffer = max_buffer
+        self.put_timeout = put_timeout
+        self._queues = {}
+        self._workers = {}
+        self._channels = {}
+        self.dropped = Counter()
+        self.sent = Counter()
+        self.batches = Counter()
+
+    async def put(self, guild, message):
+        queue = self._queue(guild.id)
+        try:
+            await asyncio.wait_for(queue.put((int(time.time()), message)), timeout=self.put_timeout)
+        except asyncio.TimeoutError:
+            self.dropped[guild.id] += 1
+
+    def stats(self, guild_id):
+        queue = self._queues.get(guild_id)
+        return {
+            "depth": queue.qsize() if queue else 0,
+            "capacity": self.max_buffer,
+            "dropped": self.dropped[guild_id],
+            "sent": self.sent[guild_id],
+            "batches": self.batches[guild_id],
+        }
+
+    def invalidate_channel(self, guild_id):
+        self._channels.pop(guild_id, None)
+
+    def close(self):
+        for task in self._workers.values():
+            task.cancel()
+        self._workers.clear()
+        self._queues.clear()
+
+    # -----------------------
+    # Internals
+    # -----------------------
+    def _queue(self, guild_id):
+        queue = self._queues.get(guild_id)
+        if queue is None:
+            queue = self._queues[guild_id] = asyncio.Queue(maxsize=self.max_buffer)
+            self._workers[guild_id] = asyncio.create_task(self._worker(guild_id, queue))
+        return queue
+
+    def _channel(self, guild_id):
+        if guild_id not in self._channels:
+            guild = self.bot.get_guild(guild_id)
+            channel = get(guild.text_channels, name=LOG_CHANNEL_NAME) if guild else None
+            self._channels[guild_id] = channel.id if channel else None
+        channel_id = self._channels[guild_id]
+        return self.bot.get_channel(channel_id) if channel_id else None
+
+    async def _worker(self, guild_id, queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            entries = [await queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(entries) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    entries.append(await asyncio.wait_for(queue.get(), timeout=timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._flush(guild_id, entries)
+            except Exception as e:
+                self.dropped[guild_id] += len(entries)
+                print(f"Mod-log flush failed for guild {guild_id}: {e}")
+
+    async def _flush(self, guild_id, entries):
+        channel = self._channel(guild_id)
+        if channel is None:
+            # no mod-log channel to send to: the entries are lost, so report them
+            self.dropped[guild_id] += len(entries)
+            return
+        if len(entries) == 1:
+            await channel.send(entries[0][1])
+        else:
+            for description in self._chunks(f"<t:{ts}:T> {message}" for ts, message in entries):
+                await channel.send(embed=nextcord.Embed(title="Mod log", description=description))
+        self.sent[guild_id] += len(entries)
+        self.batches[guild_id] += 1
+
+    @staticmethod
+    def _chunks(lines):
+        chunk, size = [], 0
+        for line in lines:
+            line = line[:EMBED_LIMIT]
+            if chunk and size + len(line) + 1 > EMBED_LIMIT:
+                yield "\n".join(chunk)
+                chunk, size = [], 0
+            chunk.append(line)
+            size += len(line) + 1
+        if chunk:
+            yield "\n".join(chunk)
@@ -0,0 +1,92 @@
+import asyncio
+import time
+
+import nextcord
+
+from apps.db import get_database
+from apps.sharding import owns_guild
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS overwrite_jobs (
+    guild_id INTEGER PRIMARY KEY,
+    role_id INTEGER NOT NULL
+)
+"""
+
+
+class OverwritePropagator:
+    """Applies the Muted role's channel overwrite across a guild.
+
+    Channels that already deny send_messages to the role are skipped, and the
+    job is recorded in SQLite until it finishes, so an interrupted run is
+    picked up again by ``resume`` and only touches the remaining channels.
+    Requests are spread over at most ``concurrency`` in-flight calls per
+    guild; nextcord's per-route bucket handling takes care of any 429s.
+    """
+
+    def __init__(self, concurrency=5, db=None):
+        self.concurrency = concurrency
+        self.db = db or get_database()
+        self.db.executescript(SCHEMA)
+        self._jobs = {}
+
+    @staticmethod
+    def needs_overwrite(channel, role):
+        return channel.overwrites_for(role).send_messages is not False
+
+    async def apply_channel(self, channel, role):
+        if self.needs_overwrite(channel, role):
+            await channel.set_permissions(role, send_messages=False)
+
+    def start(self, guild, role, progress=None):
+        """Start (or join) the guild's propagation job and return its task."""
+        task = self._jobs.get(guild.id)
+        if task is None or task.done():
+            task = self._jobs[guild.id] = asyncio.create_task(self._run(guild, role, progress))
+        return task
+
+    async def resume(self, bot):
+        for row in await self.db.run("SELECT guild_id, role_id FROM overwrite_jobs"):
+            guild = bot.get_guild(row["guild_id"])
+            if guild is None:
+                continue  # unavailable, or owned by another shard process
+            role = guild.get_role(row["role_id"])
+            if role is None:
+                await self.db.run("DELETE FROM overwrite_jobs WHERE guild_id = ?", (row["guild_id"],))
+                continue
+            self.start(guild, role)
+
+    def close(self):
+        for task in self._jobs.values():
+            task.cancel()
+        self._jobs.clear()
+
+    async def _run(self, guild, role, progress):
+        await self.db.run(
+            "INSERT OR REPLACE INTO overwrite_jobs (guild_id, role_id) VALUES (?, ?)", (guild.id, role.id)
+        )
+        pending = [channel for channel in guild.channels if self.needs_overwrite(channel, role)]
+        total = len(pending)
+        done = failed = 0
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def apply(channel):
+            nonlocal done, failed
+            async with semaphore:
+                try:
+                    await channel.set_permissions(role, send_messages=False)
+                except nextcord.HTTPException:
+                    failed += 1
+                done += 1
+                if progress:
+                    try:
+                        await progress(done, total, failed)
+                    except nextcord.HTTPException:
+                        pass  # status message may have been deleted
+
+        start = time.monotonic()
+        await asyncio.gather(*(apply(channel) for channel in pending))
+        # Failed channels keep the job recorded so the next resume retries them
+        if not failed:
+            await self.db.run("DELETE FROM overwrite_jobs WHERE guild_id = ?", (guild.id,))
+        return {"total": total, "failed": failed, "seconds": round(time.monotonic() - start, 1)}
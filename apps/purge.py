@@ -0,0 +1,136 @@
+import asyncio
+import datetime
+import re
+
+import nextcord
+
+BULK_DELETE_MAX_AGE = datetime.timedelta(days=14)
+BULK_BATCH = 100
+LINK_RE = re.compile(r"https?://\S+", re.IGNORECASE)
+
+
+class PurgeFilter:
+    def __init__(self, author_id=None, pattern=None, attachments=False, links=False, after=None, before=None,
+                 skip_ids=()):
+        self.author_id = author_id
+        self.pattern = re.compile(pattern, re.IGNORECASE) if pattern else None
+        self.attachments = attachments
+        self.links = links
+        self.after = after
+        self.before = before
+        self.skip_ids = set(skip_ids)
+
+    def matches(self, message):
+        if message.id in self.skip_ids:
+            return False
+        if self.author_id is not None and message.author.id != self.author_id:
+            return False
+        if self.pattern and not self.pattern.search(message.content):
+            return False
+        if self.attachments and not message.attachments:
+            return False
+        if self.links and not LINK_RE.search(message.content):
+            return False
+        return True
+
+
+class PurgeProgress:
+    __slots__ = ("scanned", "deleted", "failed", "done", "cancelled")
+
+    def __init__(self):
+        self.scanned = 0
+        self.deleted = 0
+        self.failed = 0
+        self.done = False
+        self.cancelled = False
+
+
+class Purger:
+    """Runs filtered purges, one job per channel.
+
+    Matches younger than 14 days go out in bulk-delete batches of 100;
+    older ones are deleted one by one with ``old_delay`` seconds between
+    calls. ``progress`` is awaited after every batch so the caller can
+    stream status edits, and ``cancel`` stops a running job between calls.
+    """
+
+    def __init__(self, old_delay=1.0):
+        self.old_delay = old_delay
+        self._jobs = {}
+
+    def is_running(self, channel_id):
+        task = self._jobs.get(channel_id)
+        return task is not None and not task.done()
+
+    def start(self, channel, limit, purge_filter, progress=None):
+        task = self._jobs[channel.id] = asyncio.create_task(self._run(channel, limit, purge_filter, progress))
+        return task
+
+    def cancel(self, channel_id):
+        task = self._jobs.get(channel_id)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    def close(self):
+        for task in self._jobs.values():
+            task.cancel()
+        self._jobs.clear()
+
+    async def _run(self, channel, limit, purge_filter, progress):
+        state = PurgeProgress()
+        bulk, old = [], []
+        cutoff = nextcord.utils.utcnow() - BULK_DELETE_MAX_AGE
+
+        async def report():
+            if progress:
+                try:
+                    await progress(state)
+                except nextcord.HTTPException:
+                    pass  # status message may have been deleted
+
+        try:
+            async for message in channel.history(limit=limit, before=purge_filter.before, after=purge_filter.after):
+                state.scanned += 1
+                if not purge_filter.matches(message):
+                    continue
+                if message.created_at > cutoff:
+                    bulk.append(message)
+                    if len(bulk) == BULK_BATCH:
+                        await self._delete_bulk(channel, bulk, state)
+                        bulk = []
+                        await report()
+                else:
+                    old.append(message)
+            if bulk:
+                await self._delete_bulk(channel, bulk, state)
+                await report()
+            for message in old:
+                try:
+                    await message.delete()
+                    state.deleted += 1
+                except nextcord.NotFound:
+                    pass
+                except nextcord.HTTPException:
+                    state.failed += 1
+                if state.deleted % 10 == 0:
+                    await report()
+                await asyncio.sleep(self.old_delay)
+        except asyncio.CancelledError:
+            state.cancelled = True
+        state.done = True
+        await report()
+        return state
+
+    async def _delete_bulk(self, channel, messages, state):
+        try:
+            if len(messages) == 1:
+                await messages[0].delete()
+            else:
+                await channel.delete_messages(messages)
+            state.deleted += len(messages)
+        except nextcord.NotFound:
+            pass
+        except nextcord.HTTPException:
+            state.failed += len(messages)
@@ -0,0 +1,107 @@
+import random
+
+
+class _Node:
+    __slots__ = ("key", "priority", "left", "right", "size")
+
+    def __init__(self, key):
+        self.key = key
+        self.priority = random.random()
+        self.left = None
+        self.right = None
+        self.size = 1
+
+
+def _size(node):
+    return node.size if node else 0
+
+
+def _update(node):
+    node.size = 1 + _size(node.left) + _size(node.right)
+
+
+def _split(node, key):
+    """Split into (keys < key, keys >= key)."""
+    if node is None:
+        return None, None
+    if node.key < key:
+        left, right = _split(node.right, key)
+        node.right = left
+        _update(node)
+        return node, right
+    left, right = _split(node.left, key)
+    node.left = right
+    _update(node)
+    return left, node
+
+
+def _merge(left, right):
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        _update(left)
+        return left
+    right.left = _merge(left, right.left)
+    _update(right)
+    return right
+
+
+def _drop_leftmost(node):
+    if node.left is None:
+        return node.right
+    node.left = _drop_leftmost(node.left)
+    _update(node)
+    return node
+
+
+class RankedSet:
+    """Order-statistic treap: insert, remove and rank in O(log n).
+
+    Keys must be unique and comparable; the smallest key has rank 0.
+    """
+
+    def __init__(self):
+        self._root = None
+
+    def __len__(self):
+        return _size(self._root)
+
+    def add(self, key):
+        left, right = _split(self._root, key)
+        self._root = _merge(_merge(left, _Node(key)), right)
+
+    def remove(self, key):
+        left, right = _split(self._root, key)
+        if right is not None:
+            node = right
+            while node.left is not None:
+                node = node.left
+            if node.key == key:
+                right = _drop_leftmost(right)
+        self._root = _merge(left, right)
+
+    def rank(self, key):
+        """Number of keys smaller than ``key``."""
+        rank, node = 0, self._root
+        while node is not None:
+            if node.key < key:
+                rank += _size(node.left) + 1
+                node = node.right
+            else:
+                node = node.left
+        return rank
+
+    def first(self, n):
+        """The ``n`` smallest keys, in order."""
+        result, stack, node = [], [], self._root
+        while (stack or node is not None) and len(result) < n:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            result.append(node.key)
+            node = node.right
+        return result
@@ -0,0 +1,92 @@
+import asyncio
+from collections import defaultdict
+
+import nextcord
+
+
+class RoleMutationQueue:
+    """Debounced, per-member role changes applied as one member edit.
+
+    add/remove only record the desired state of a role for a member. After
+    ``debounce`` seconds the net delta is applied with a single edit that
+    sets the member's full role list (or skipped if it cancels out).
+    Flushes run with at most ``concurrency`` edits in flight per guild.
+    """
+
+    def __init__(self, bot, debounce=1.0, concurrency=2):
+        self.bot = bot
+        self.debounce = debounce
+        self.concurrency = concurrency
+        self._pending = {}
+        self._semaphores = defaultdict(lambda: asyncio.Semaphore(self.concurrency))
+        self._tasks = set()
+        self.requested = 0
+        self.edits = 0
+        self.noops = 0
+        self.failed = 0
+
+    def add(self, guild_id, member_id, role_id):
+        self._record(guild_id, member_id, role_id, True)
+
+    def remove(self, guild_id, member_id, role_id):
+        self._record(guild_id, member_id, role_id, False)
+
+    def pending_state(self, guild_id, member_id, role_id):
+        """Queued target state for a role (True/False), or None if nothing is queued."""
+        delta = self._pending.get((guild_id, member_id))
+        return delta.get(role_id) if delta else None
+
+    def stats(self):
+        return {
+            "requested": self.requested,
+            "edits": self.edits,
+            "noops": self.noops,
+            "failed": self.failed,
+            "collapsed": self.requested - self.edits - self.failed,
+            "pending": len(self._pending),
+        }
+
+    def close(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks.clear()
+        self._pending.clear()
+
+    def _record(self, guild_id, member_id, role_id, present):
+        self.requested += 1
+        key = (guild_id, member_id)
+        delta = self._pending.get(key)
+        if delta is None:
+            delta = self._pending[key] = {}
+            asyncio.get_running_loop().call_later(self.debounce, self._spawn, key)
+        delta[role_id] = present
+
+    def _spawn(self, key):
+        task = asyncio.create_task(self._flush(key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, key):
+        guild_id, member_id = key
+        async with self._semaphores[guild_id]:
+            delta = self._pending.pop(key, None)
+            guild = self.bot.get_guild(guild_id)
+            member = guild.get_member(member_id) if guild else None
+            if not delta or member is None:
+                return
+            current = {role.id for role in member.roles if not role.is_default()}
+            desired = set(current)
+            for role_id, present in delta.items():
+                if present:
+                    desired.add(role_id)
+                else:
+                    desired.discard(role_id)
+            if desired == current:
+                self.noops += 1
+                return
+            try:
+                await member.edit(roles=[nextcord.Object(id=role_id) for role_id in desired])
+                self.edits += 1
+            except nextcord.HTTPException as e:
+                self.failed += 1
+                print(f"Role update failed for {member_id} in guild {guild_id}: {e}")
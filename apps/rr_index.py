@@ -0,0 +1,80 @@
+from collections import defaultdict
+
+import nextcord
+
+
+def emoji_key(emoji):
+    """Stable key for an emoji: the ID for custom emojis, the character otherwise."""
+    if isinstance(emoji, str):
+        emoji = nextcord.PartialEmoji.from_str(emoji)
+    return emoji.id or emoji.name
+
+
+class ReactionRoleIndex:
+    """(message_id, emoji_key) -> role_id lookup for reaction-role messages.
+
+    Entries saved before role IDs were stored only carry role names; those
+    are resolved against the guild the first time one of their reactions
+    arrives and then served from the index like everything else.
+    """
+
+    def __init__(self):
+        self._roles = {}
+        self._by_role = defaultdict(set)
+        self._by_message = defaultdict(set)
+        self._pending = {}
+
+    def __contains__(self, message_id):
+        return message_id in self._by_message or message_id in self._pending
+
+    def add_message(self, message_id, mapping):
+        """mapping: {emoji (str or key): role_id}"""
+        self.remove_message(message_id)
+        for emoji, role_id in mapping.items():
+            key = (message_id, emoji if isinstance(emoji, int) else emoji_key(emoji))
+            self._roles[key] = role_id
+            self._by_role[role_id].add(key)
+            self._by_message[message_id].add(key)
+
+    def add_legacy(self, message_id, mapping):
+        """mapping: {emoji str: role name}, resolved on first use."""
+        self.remove_message(message_id)
+        self._pending[message_id] = mapping
+
+    def remove_message(self, message_id):
+        self._pending.pop(message_id, None)
+        for key in self._by_message.pop(message_id, ()):
+            role_id = self._roles.pop(key)
+            self._by_role[role_id].discard(key)
+            if not self._by_role[role_id]:
+                del self._by_role[role_id]
+
+    def remove_role(self, role_id):
+        for key in self._by_role.pop(role_id, ()):
+            del self._roles[key]
+            self._by_message[key[0]].discard(key)
+            if not self._by_message[key[0]]:
+                del self._by_message[key[0]]
+
+    def resolve(self, message_id, guild):
+        """Resolve a legacy name mapping; returns {emoji: role_id} or None."""
+        mapping = self._pending.pop(message_id, None)
+        if mapping is None:
+            return None
+        by_name = {role.name: role.id for role in guild.roles}
+        resolved = {emoji: by_name[name] for emoji, name in mapping.items() if name in by_name}
+        self.add_message(message_id, resolved)
+        return resolved
+
+    def roles_for(self, message_id):
+        """{emoji_key: role_id} for one message."""
+        return {key[1]: self._roles[key] for key in self._by_message.get(message_id, ())}
+
+    def messages_for_role(self, role_id):
+        return {key[0] for key in self._by_role.get(role_id, ())}
+
+    def lookup(self, message_id, key):
+        return self._roles.get((message_id, key))
+
+    def has_pending(self, message_id):
+        return message_id in self._pending
@@ -0,0 +1,141 @@
+import asyncio
+import time
+from collections import defaultdict
+from itertools import groupby
+
+import nextcord
+
+from apps.db import get_database
+from apps.rr_index import emoji_key
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rr_reconcile_progress (
+    guild_id INTEGER PRIMARY KEY,
+    last_message_id INTEGER NOT NULL,
+    started_at REAL NOT NULL
+)
+"""
+
+# An interrupted pass newer than this resumes after its last finished
+# message; older ones start over, since more drift has built up since.
+RESUME_WINDOW = 15 * 60
+
+
+class ReactionRoleReconciler:
+    """Brings member roles back in line with the reactions on tracked messages.
+
+    Guilds are processed in the background with at most ``concurrency``
+    messages in flight. Reactors are paged from the API and missing roles
+    are handed to the role queue. Progress is committed after every message
+    so an interrupted pass picks up where it stopped.
+
+    With ``remove_missing`` (the default), a role is also taken back from
+    members who no longer react, but only from members that reaction roles granted it to,
+    and only once every tracked message mapping that role has been read in
+    the same pass. Roles given by admins or button menus are never touched.
+    """
+
+    def __init__(self, bot, index, store, role_queue, concurrency=3, remove_missing=True, db=None):
+        self.bot = bot
+        self.index = index
+        self.store = store
+        self.role_queue = role_queue
+        self.remove_missing = remove_missing
+        self.db = db or get_database()
+        self.db.executescript(SCHEMA)
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.added = 0
+        self.removed = 0
+        self.messages = 0
+
+    async def run(self):
+        locations = await asyncio.to_thread(self.store.locations)
+        progress = {
+            row["guild_id"]: row
+            for row in await self.db.run("SELECT * FROM rr_reconcile_progress")
+        }
+        await asyncio.gather(*(
+            self._reconcile_guild(guild_id, [(channel_id, message_id) for _, channel_id, message_id in rows],
+                                  progress.get(guild_id))
+            for guild_id, rows in groupby(locations, key=lambda row: row[0])
+        ))
+
+    async def _reconcile_guild(self, guild_id, messages, progress):
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            return
+        started_at, after = time.time(), 0
+        if progress and started_at - progress["started_at"] < RESUME_WINDOW:
+            started_at, after = progress["started_at"], progress["last_message_id"]
+        # role_id -> reactors across every message read in this pass
+        reactors = defaultdict(set)
+        read = set()
+        for channel_id, message_id in messages:
+            if message_id <= after:
+                continue
+            try:
+                async with self._semaphore:
+                    wanted = await self._reconcile_message(guild, channel_id, message_id)
+            except nextcord.HTTPException as e:
+                print(f"Reaction-role reconcile skipped message {message_id}: {e}")
+                wanted = None
+            if wanted is not None:
+                read.add(message_id)
+                for role_id, user_ids in wanted.items():
+                    reactors[role_id] |= user_ids
+            await self.db.run(
+                "INSERT OR REPLACE INTO rr_reconcile_progress (guild_id, last_message_id, started_at) VALUES (?, ?, ?)",
+                (guild_id, message_id, started_at),
+            )
+        if self.remove_missing:
+            await self._remove_missing(guild, reactors, read)
+        await self.db.run("DELETE FROM rr_reconcile_progress WHERE guild_id = ?", (guild_id,))
+
+    async def _reconcile_message(self, guild, channel_id, message_id):
+        """Queue missing roles for one message; returns {role_id: reactor ids} or None if it was not read."""
+        roles = self.index.roles_for(message_id)
+        channel = guild.get_channel(channel_id)
+        if not roles or channel is None:
+            return None
+        message = await channel.fetch_message(message_id)
+        reactors = {key: set() for key in roles}
+        for reaction in message.reactions:
+            key = emoji_key(reaction.emoji)
+            if key not in reactors:
+                continue
+            # ReactionIterator pages through reactors 100 at a time
+            async for user in reaction.users(limit=None):
+                if user.id != self.bot.user.id:
+                    reactors[key].add(user.id)
+
+        # Several emojis may grant the same role
+        wanted = defaultdict(set)
+        for key, role_id in roles.items():
+            wanted[role_id] |= reactors[key]
+
+        for role_id, user_ids in wanted.items():
+            if guild.get_role(role_id) is None:
+                continue
+            # look up each reactor instead of scanning the guild for role holders
+            for user_id in user_ids:
+                member = guild.get_member(user_id)
+                if member is not None and member.get_role(role_id) is None:
+                    self.role_queue.add(guild.id, user_id, role_id)
+                    await self.store.record_grant(guild.id, user_id, role_id)
+                    self.added += 1
+        self.messages += 1
+        return wanted
+
+    async def _remove_missing(self, guild, reactors, read):
+        for role_id, user_ids in reactors.items():
+            role = guild.get_role(role_id)
+            # a message sharing this role was not read, so its reactors are unknown
+            if role is None or not self.index.messages_for_role(role_id) <= read:
+                continue
+            granted = await asyncio.to_thread(self.store.granted, guild.id, role_id)
+            for user_id in granted - user_ids:
+                member = guild.get_member(user_id)
+                if member is not None and member.get_role(role_id) is not None:
+                    self.role_queue.remove(guild.id, user_id, role_id)
+                    self.removed += 1
+                await self.store.record_grant(guild.id, user_id, role_id, granted=False)
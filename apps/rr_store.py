@@ -0,0 +1,102 @@
+from apps.db import get_database
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reaction_roles (
+    message_id INTEGER NOT NULL,
+    emoji TEXT NOT NULL,
+    guild_id INTEGER,
+    channel_id INTEGER,
+    role_id INTEGER,
+    role_name TEXT,
+    PRIMARY KEY (message_id, emoji)
+);
+CREATE TABLE IF NOT EXISTS reaction_role_grants (
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    role_id INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, role_id, user_id)
+);
+"""
+
+
+class ReactionRoleStore:
+    """Row-per-emoji reaction-role storage in SQLite (WAL).
+
+    Writes touch only the rows of one message and run in a worker thread
+    inside a single transaction, so a crash can never leave other messages'
+    mappings half-written.
+    """
+
+    def __init__(self, db=None):
+        self.db = db or get_database()
+        self.db.executescript(SCHEMA)
+        columns = {row["name"] for row in self.db.execute("PRAGMA table_info(reaction_roles)")}
+        if "channel_id" not in columns:
+            self.db.execute("ALTER TABLE reaction_roles ADD COLUMN channel_id INTEGER")
+
+    def load(self):
+        """Returns ({message_id: {emoji: role_id}}, {message_id: {emoji: role_name}})."""
+        resolved, legacy = {}, {}
+        for row in self.db.execute("SELECT message_id, emoji, role_id, role_name FROM reaction_roles"):
+            if row["role_id"] is None:
+                legacy.setdefault(row["message_id"], {})[row["emoji"]] = row["role_name"]
+            else:
+                resolved.setdefault(row["message_id"], {})[row["emoji"]] = row["role_id"]
+        return resolved, legacy
+
+    def locations(self):
+        """Returns [(guild_id, channel_id, message_id)] for messages whose channel is known."""
+        rows = self.db.execute(
+            "SELECT DISTINCT guild_id, channel_id, message_id FROM reaction_roles "
+            "WHERE channel_id IS NOT NULL AND role_id IS NOT NULL ORDER BY guild_id, message_id"
+        )
+        return [(row["guild_id"], row["channel_id"], row["message_id"]) for row in rows]
+
+    async def save_message(self, message_id, guild_id, roles, channel_id=None):
+        statements = [("DELETE FROM reaction_roles WHERE message_id = ?", (message_id,))]
+        statements += [
+            ("INSERT INTO reaction_roles (message_id, emoji, guild_id, channel_id, role_id) VALUES (?, ?, ?, ?, ?)",
+             (message_id, emoji, guild_id, channel_id, role_id))
+            for emoji, role_id in roles.items()
+        ]
+        await self.db.run_batch(statements)
+
+    async def delete_message(self, message_id):
+        await self.db.run("DELETE FROM reaction_roles WHERE message_id = ?", (message_id,))
+
+    async def record_grant(self, guild_id, user_id, role_id, granted=True):
+        """Remember which members got a role from a reaction, so only those are ever reconciled away."""
+        if granted:
+            await self.db.run(
+                "INSERT OR IGNORE INTO reaction_role_grants (guild_id, user_id, role_id) VALUES (?, ?, ?)",
+                (guild_id, user_id, role_id),
+            )
+        else:
+            await self.db.run(
+                "DELETE FROM reaction_role_grants WHERE guild_id = ? AND user_id = ? AND role_id = ?",
+                (guild_id, user_id, role_id),
+            )
+
+    def granted(self, guild_id, role_id):
+        rows = self.db.execute(
+            "SELECT user_id FROM reaction_role_grants WHERE guild_id = ? AND role_id = ?", (guild_id, role_id)
+        )
+        return {row["user_id"] for row in rows}
+
+    def import_json(self, data):
+        """Import a reaction_roles.json payload (either format) in one transaction."""
+        statements = []
+        for message_id, entry in data.items():
+            if "roles" in entry:
+                for emoji, role_id in entry["roles"].items():
+                    statements.append((
+                        "INSERT OR REPLACE INTO reaction_roles (message_id, emoji, guild_id, role_id) VALUES (?, ?, ?, ?)",
+                        (int(message_id), emoji, entry.get("guild_id"), role_id),
+                    ))
+            else:
+                for emoji, role_name in entry.items():
+                    statements.append((
+                        "INSERT OR REPLACE INTO reaction_roles (message_id, emoji, role_name) VALUES (?, ?, ?)",
+                        (int(message_id), emoji, role_name),
+                    ))
+        self.db.executebatch(statements)
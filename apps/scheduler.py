@@ -0,0 +1,151 @@
+import asyncio
+import heapq
+import time
+
+from apps.db import get_database
+from apps.sharding import owns_guild
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scheduled_unmutes (
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    role_id INTEGER NOT NULL,
+    channel_id INTEGER,
+    duration INTEGER NOT NULL,
+    due_at REAL NOT NULL,
+    PRIMARY KEY (guild_id, user_id)
+)
+"""
+
+# Failed unmutes are retried after RETRY_BASE * 2**attempt seconds, capped at RETRY_MAX
+RETRY_BASE = 30
+RETRY_MAX = 3600
+
+
+class ScheduledUnmute:
+    __slots__ = ("guild_id", "user_id", "role_id", "channel_id", "duration", "due_at", "attempts")
+
+    def __init__(self, guild_id, user_id, role_id, channel_id, duration, due_at, attempts=0):
+        self.guild_id = guild_id
+        self.user_id = user_id
+        self.role_id = role_id
+        self.channel_id = channel_id
+        self.duration = duration
+        self.due_at = due_at
+        self.attempts = attempts
+
+    @property
+    def key(self):
+        return (self.guild_id, self.user_id)
+
+
+class UnmuteScheduler:
+    """Durable timed unmutes driven by a single background task.
+
+    Pending unmutes live in SQLite and in a min-heap ordered by deadline.
+    One task sleeps until the earliest deadline (or until an earlier one is
+    scheduled) and hands every due entry to ``callback`` as one batch, so
+    the number of sleeping coroutines does not grow with the number of mutes.
+    ``callback`` returns the entries that failed. Rows are only deleted for
+    entries that succeeded; failed ones are retried with exponential backoff.
+    """
+
+    def __init__(self, callback, db=None):
+        self.callback = callback
+        self.db = db or get_database()
+        self.db.executescript(SCHEMA)
+        self._heap = []
+        self._pending = {}
+        self._wake = asyncio.Event()
+        self._task = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    async def start(self):
+        if self._task is not None:
+            return
+        rows = await self.db.run("SELECT * FROM scheduled_unmutes")
+        for row in rows:
+            if not owns_guild(row["guild_id"]):
+                continue
+            self._push(ScheduledUnmute(
+                row["guild_id"], row["user_id"], row["role_id"], row["channel_id"], row["duration"], row["due_at"]
+            ))
+        self._task = asyncio.create_task(self._run())
+
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def schedule(self, guild_id, user_id, role_id, channel_id, duration):
+        entry = ScheduledUnmute(guild_id, user_id, role_id, channel_id, duration, time.time() + duration)
+        await self.db.run(
+            "INSERT OR REPLACE INTO scheduled_unmutes (guild_id, user_id, role_id, channel_id, duration, due_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (entry.guild_id, entry.user_id, entry.role_id, entry.channel_id, entry.duration, entry.due_at),
+        )
+        self._push(entry)
+        self._wake.set()
+        return entry
+
+    async def cancel(self, guild_id, user_id):
+        # The heap entry is left in place and skipped when it surfaces.
+        if self._pending.pop((guild_id, user_id), None) is None:
+            return False
+        await self.db.run(
+            "DELETE FROM scheduled_unmutes WHERE guild_id = ? AND user_id = ?", (guild_id, user_id)
+        )
+        return True
+
+    def _push(self, entry):
+        self._pending[entry.key] = entry
+        heapq.heappush(self._heap, (entry.due_at, entry.guild_id, entry.user_id, entry))
+
+    def _pop_due(self, now):
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)[3]
+            if self._pending.get(entry.key) is entry:
+                del self._pending[entry.key]
+                due.append(entry)
+        return due
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            due = self._pop_due(time.time())
+            if due:
+                try:
+                    failed = await self.callback(due) or []
+                except Exception as e:
+                    print(f"Scheduled unmute batch failed: {e}")
+                    failed = due
+                await self._settle(due, failed)
+                continue
+            timeout = self._heap[0][0] - time.time() if self._heap else None
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _settle(self, due, failed):
+        failed_keys = {entry.key for entry in failed}
+        # due_at in the WHERE keeps a mute re-applied meanwhile from being touched
+        await self.db.run_many(
+            "DELETE FROM scheduled_unmutes WHERE guild_id = ? AND user_id = ? AND due_at = ?",
+            [(*entry.key, entry.due_at) for entry in due if entry.key not in failed_keys],
+        )
+        for entry in failed:
+            if entry.key in self._pending:
+                # muted again or rescheduled while the batch ran
+                continue
+            delay = min(RETRY_BASE * 2 ** entry.attempts, RETRY_MAX)
+            retry = ScheduledUnmute(entry.guild_id, entry.user_id, entry.role_id, entry.channel_id,
+                                    entry.duration, time.time() + delay, entry.attempts + 1)
+            await self.db.run(
+                "UPDATE scheduled_unmutes SET due_at = ? WHERE guild_id = ? AND user_id = ? AND due_at = ?",
+                (retry.due_at, entry.guild_id, entry.user_id, entry.due_at),
+            )
+            self._push(retry)
@@ -0,0 +1,40 @@
+import requests
+
+from config import SHARD_COUNT, SHARD_IDS
+
+
+def shard_for(guild_id, shard_count):
+    return (guild_id >> 22) % shard_count
+
+
+def owns_guild(guild_id):
+    """Whether this process's shards receive events for ``guild_id``.
+
+    Always true unless the process was started for a subset of shards, in
+    which case local state (configs, XP, unmutes) only loads its own guilds.
+    SQLite is the store shared between worker processes; each guild is only
+    ever written by the one process that owns its shard.
+    """
+    if not SHARD_COUNT or SHARD_IDS is None:
+        return True
+    return shard_for(guild_id, SHARD_COUNT) in SHARD_IDS
+
+
+def recommended_shards(token):
+    r = requests.get(
+        "https://discord.com/api/v10/gateway/bot", headers={"Authorization": f"Bot {token}"}, timeout=10
+    )
+    r.raise_for_status()
+    return r.json()["shards"]
+
+
+def shard_ranges(shard_count, workers):
+    """Split shard IDs 0..shard_count-1 into at most ``workers`` contiguous ranges."""
+    workers = max(1, min(workers, shard_count))
+    size, extra = divmod(shard_count, workers)
+    ranges, start = [], 0
+    for i in range(workers):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
@@ -0,0 +1,76 @@
+import time
+from collections import OrderedDict, deque
+
+RATE = "rate"
+DUPLICATE = "duplicate"
+
+
+class _UserWindow:
+    __slots__ = ("timestamps", "recent", "counts")
+
+    def __init__(self, max_messages, history):
+        self.timestamps = deque(maxlen=max_messages)
+        self.recent = deque(maxlen=history)
+        self.counts = {}
+
+
+class SpamDetector:
+    """Sliding-window message-rate and duplicate-content checks.
+
+    Each (guild, user) keeps a ring buffer of their last ``max_messages``
+    timestamps and of the last ``history`` content hashes with a count per
+    hash, so duplicates are caught across channels. Users live in an LRU
+    capped at ``max_users``; the least recently active are evicted first.
+    Every check is O(1) amortized.
+    """
+
+    def __init__(self, max_messages=5, window=5.0, duplicate_limit=3, duplicate_window=30.0, history=10,
+                 max_users=50000):
+        self.max_messages = max_messages
+        self.window = window
+        self.duplicate_limit = duplicate_limit
+        self.duplicate_window = duplicate_window
+        self.history = history
+        self.max_users = max_users
+        self._users = OrderedDict()
+
+    def __len__(self):
+        return len(self._users)
+
+    def check(self, guild_id, user_id, content, now=None):
+        """Record a message and return RATE, DUPLICATE or None."""
+        now = time.monotonic() if now is None else now
+        key = (guild_id, user_id)
+        state = self._users.get(key)
+        if state is None:
+            state = self._users[key] = _UserWindow(self.max_messages, self.history)
+            if len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        else:
+            self._users.move_to_end(key)
+
+        state.timestamps.append(now)
+        rate_hit = len(state.timestamps) == self.max_messages and now - state.timestamps[0] <= self.window
+
+        duplicate_hit = False
+        content = content.strip().lower()
+        if content:
+            recent, counts = state.recent, state.counts
+            while recent and (now - recent[0][0] > self.duplicate_window or len(recent) == recent.maxlen):
+                _, old = recent.popleft()
+                counts[old] -= 1
+                if not counts[old]:
+                    del counts[old]
+            digest = hash(content)
+            recent.append((now, digest))
+            counts[digest] = counts.get(digest, 0) + 1
+            duplicate_hit = counts[digest] >= self.duplicate_limit
+
+        if rate_hit:
+            return RATE
+        if duplicate_hit:
+            return DUPLICATE
+        return None
+
+    def forget(self, guild_id, user_id):
+        self._users.pop((guild_id, user_id), None)
@@ -0,0 +1,292 @@
+import hashlib
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from apps.db import get_database
+from config import DEEPL_API_KEY, GOOGLE_API_KEY, TRANSLATE_PROVIDER
+
+# Optional translator lib (Libre via deep_translator)
+try:
+    from deep_translator import LibreTranslator
+    TRANSLATOR_AVAILABLE = True
+except Exception:
+    TRANSLATOR_AVAILABLE = False
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS translations (
+    provider TEXT NOT NULL,
+    target TEXT NOT NULL,
+    text_hash TEXT NOT NULL,
+    translated TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (provider, target, text_hash)
+);
+CREATE INDEX IF NOT EXISTS translations_created ON translations (created_at);
+"""
+
+GOOGLE_URL = "https://translation.googleapis.com/language/translate/v2"
+DEEPL_URL = "https://api-free.deepl.com/v2/translate"
+# Strings per provider request
+BATCH_LIMITS = {"google": 128, "deepl": 50, "libre": 25}
+LOOKUP_CHUNK = 500
+# Stored translations older than this are pruned, and the table is capped at MAX_STORED rows
+RETENTION = 30 * 86400
+MAX_STORED = 200000
+PRUNE_INTERVAL = 3600
+
+
+class TranslationError(Exception):
+    pass
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class TranslationStats:
+    def __init__(self, samples=500):
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+        self.provider_calls = 0
+        self.provider_errors = 0
+        self._latency = deque(maxlen=samples)
+
+    def record(self, memory_hits=0, store_hits=0, misses=0):
+        with self._lock:
+            self.memory_hits += memory_hits
+            self.store_hits += store_hits
+            self.misses += misses
+
+    def record_call(self, seconds, ok=True):
+        with self._lock:
+            self.provider_calls += 1
+            if not ok:
+                self.provider_errors += 1
+            self._latency.append(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.memory_hits + self.store_hits + self.misses
+            latency = sorted(self._latency)
+
+        def pick(q):
+            if not latency:
+                return None
+            return round(latency[min(int(q * len(latency)), len(latency) - 1)] * 1000, 1)
+
+        return {
+            "lookups": lookups,
+            "memory_hits": self.memory_hits,
+            "store_hits": self.store_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.memory_hits + self.store_hits) / lookups, 4) if lookups else None,
+            "provider_calls": self.provider_calls,
+            "provider_errors": self.provider_errors,
+            "provider_latency_ms": {"p50": pick(0.5), "p95": pick(0.95), "max": pick(1.0)},
+        }
+
+
+class TranslationClient:
+    """Caching, batching translation client shared by the bot and the dashboard API.
+
+    Lookups go through an in-memory LRU, then a SQLite table keyed by
+    (provider, target, sha256(text)). Only misses reach the provider, deduped
+    and sent in as few requests as the provider allows. New translations are
+    written to SQLite by a background thread, which also prunes rows older
+    than ``retention`` seconds and beyond ``max_stored``. Thread-safe; async
+    callers should run it in a worker thread.
+    """
+
+    def __init__(self, provider=TRANSLATE_PROVIDER, google_key=GOOGLE_API_KEY, deepl_key=DEEPL_API_KEY,
+                 cache_size=10000, db=None, timeout=(5, 30), retention=RETENTION, max_stored=MAX_STORED):
+        self.provider = (provider or "libre").lower()
+        self.google_key = google_key
+        self.deepl_key = deepl_key
+        self.cache_size = cache_size
+        self.timeout = timeout
+        self.retention = retention
+        self.max_stored = max_stored
+        self.db = db or get_database()
+        self.db.executescript(SCHEMA)
+        self.stats = TranslationStats()
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+        self._writes = queue.Queue()
+        self._writer = None
+
+    @property
+    def available(self):
+        if self.provider == "google":
+            return bool(self.google_key)
+        if self.provider == "deepl":
+            return bool(self.deepl_key)
+        return self.provider == "libre" and TRANSLATOR_AVAILABLE
+
+    # -----------------------
+    # Public API
+    # -----------------------
+    def translate(self, text, target):
+        return self.translate_many([text], target)[0]
+
+    def translate_many(self, texts, target):
+        """Translate ``texts`` into ``target``; returns translations in input order."""
+        if not self.available:
+            raise TranslationError("no translator configured or missing API key")
+        target = target.lower()
+        found, missing = self.lookup(texts, target, record=True)
+
+        fresh = {}
+        limit = BATCH_LIMITS.get(self.provider, 25)
+        try:
+            for i in range(0, len(missing), limit):
+                chunk = missing[i:i + limit]
+                fresh.update(zip(chunk, self._call_provider(chunk, target)))
+        finally:
+            # keep what was translated even if a later chunk failed
+            found.update(fresh)
+            self._remember(target, found)
+            if fresh:
+                # already in the LRU; persisting is kept off the caller's path
+                now = time.time()
+                self._persist([(self.provider, target, text_hash(t), translated, now) for t, translated in fresh.items()])
+        return [found[text] for text in texts]
+
+    # -----------------------
+    # Cache tiers
+    # -----------------------
+    def lookup(self, texts, target, record=False):
+        """Cached translations only: returns ({text: translated}, [unique texts not cached])."""
+        target = target.lower()
+        found, missing = {}, []
+        with self._lock:
+            for text in dict.fromkeys(texts):
+                key = (self.provider, target, text_hash(text))
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    found[text] = self._cache[key]
+                else:
+                    missing.append(text)
+        memory_hits = len(found)
+
+        stored = self._load(target, missing)
+        found.update(stored)
+        missing = [text for text in missing if text not in stored]
+        if record:
+            self.stats.record(memory_hits=memory_hits, store_hits=len(stored), misses=len(missing))
+        return found, missing
+
+    def _remember(self, target, translations):
+        with self._lock:
+            for text, translated in translations.items():
+                key = (self.provider, target, text_hash(text))
+                self._cache[key] = translated
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _persist(self, rows):
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="translation-store", daemon=True)
+                self._writer.start()
+        self._writes.put(rows)
+
+    def _write_loop(self):
+        pruned = None
+        while True:
+            rows = self._writes.get()
+            try:
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO translations (provider, target, text_hash, translated, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                if pruned is None or time.monotonic() - pruned >= PRUNE_INTERVAL:
+                    pruned = time.monotonic()
+                    self.prune()
+            except Exception as e:
+                print(f"Storing translations failed: {e}")
+
+    def prune(self):
+        """Drop stored translations past the retention window or beyond the size cap."""
+        self.db.execute("DELETE FROM translations WHERE created_at < ?", (time.time() - self.retention,))
+        self.db.execute(
+            "DELETE FROM translations WHERE rowid IN "
+            "(SELECT rowid FROM translations ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_stored,),
+        )
+
+    def _load(self, target, texts):
+        by_hash = {text_hash(text): text for text in texts}
+        hashes = list(by_hash)
+        found = {}
+        for i in range(0, len(hashes), LOOKUP_CHUNK):
+            chunk = hashes[i:i + LOOKUP_CHUNK]
+            rows = self.db.execute(
+                f"SELECT text_hash, translated FROM translations WHERE provider = ? AND target = ? "
+                f"AND text_hash IN ({','.join('?' * len(chunk))})",
+                (self.provider, target, *chunk),
+            )
+            found.update((by_hash[row["text_hash"]], row["translated"]) for row in rows)
+        return found
+
+    # -----------------------
+    # Providers
+    # -----------------------
+    def _call_provider(self, texts, target):
+        start = time.perf_counter()
+        try:
+            if self.provider == "google":
+                result = self._google(texts, target)
+            elif self.provider == "deepl":
+                result = self._deepl(texts, target)
+            else:
+                result = LibreTranslator(source="auto", target=target).translate_batch(texts)
+        except Exception as e:
+            self.stats.record_call(time.perf_counter() - start, ok=False)
+            if isinstance(e, TranslationError):
+                raise
+            raise TranslationError(str(e)) from e
+        self.stats.record_call(time.perf_counter() - start)
+        if len(result) != len(texts):
+            raise TranslationError(f"{self.provider} returned {len(result)} translations for {len(texts)} texts")
+        return result
+
+    def _google(self, texts, target):
+        resp = self.session.post(
+            GOOGLE_URL, params={"key": self.google_key},
+            json={"q": texts, "target": target, "format": "text"}, timeout=self.timeout,
+        )
+        if resp.status_code >= 400:
+            raise TranslationError(f"google failed: {resp.status_code} {resp.text}")
+        return [t["translatedText"] for t in resp.json()["data"]["translations"]]
+
+    def _deepl(self, texts, target):
+        resp = self.session.post(
+            DEEPL_URL,
+            headers={"Authorization": f"DeepL-Auth-Key {self.deepl_key}"},
+            data=[("text", text) for text in texts] + [("target_lang", target.upper())],
+            timeout=self.timeout,
+        )
+        if resp.status_code >= 400:
+            raise TranslationError(f"deepl failed: {resp.status_code} {resp.text}")
+        return [t["text"] for t in resp.json()["translations"]]
+
+
+_translator = None
+
+
+def get_translator():
+    global _translator
+    if _translator is None:
+        _translator = TranslationClient()
+    return _translator
@@ -1,21 +1,22 @@
 # backend/app.py
+import hashlib
 import os
-import json
 import time
 from functools import wraps
 from urllib.parse import urlencode
 
-from flask import Flask, request, session, redirect, jsonify, send_file
+from flask import Flask, request, session, redirect, jsonify
 from flask_cors import CORS
-import requests
 from dotenv import load_dotenv
 
-# Optional translator lib (Libre via deep_translator)
-try:
-    from deep_translator import LibreTranslator
-    TRANSLATOR_AVAILABLE = True
-except Exception:
-    TRANSLATOR_AVAILABLE = False
+from apps.sharding import owns_guild
+from apps.translation import TranslationError, get_translator
+from backend.discord_client import DiscordAPIError, DiscordClient, create_session
+from backend.backup_store import BackupStore, LocalBackupBackend, SupabaseBackupBackend, summary as backup_summary
+from backend.jobs import JobQueue
+from backend.oauth import GuildListCache, OAuthTokenStore
+from backend.restore import execute_plan, plan_restore, report as restore_report
+from backend.snapshot import PARTS as SNAPSHOT_PARTS, fetch_snapshot, strip_webhook_secrets
 
 load_dotenv()
 
@@ -27,21 +28,30 @@ OAUTH_REDIRECT = os.getenv("OAUTH_REDIRECT", "https://your-frontend.example.com/
 FRONTEND_ORIGIN = os.getenv("FRONTEND_ORIGIN", "http://localhost:3000")
 SUPABASE_URL = os.getenv("SUPABASE_URL")      # e.g. https://xyz.supabase.co
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")      # anon or service_role (service_role needed for inserts)
-TRANSLATE_PROVIDER = os.getenv("TRANSLATE_PROVIDER", "libre")  # libre | google | deepl
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY", "")
-DEEPL_API_KEY = os.getenv("DEEPL_API_KEY", "")
+GUILD_CACHE_TTL = int(os.getenv("GUILD_CACHE_TTL", 60))
+# TRANSLATE_PROVIDER / GOOGLE_API_KEY / DEEPL_API_KEY are read by apps.translation
 
 # ---------- Flask init ----------
 app = Flask(__name__)
 app.secret_key = os.getenv("FLASK_SECRET", os.urandom(24))
 CORS(app, origins=[FRONTEND_ORIGIN])
 
+# Shared caching translation client (also used by the bot)
+translator = get_translator()
+
+# ---------- HTTP clients ----------
+# One pooled, rate-limit-aware client for every Discord call and one pooled
+# session for Supabase.
+discord = DiscordClient()
+http = create_session()
+HTTP_TIMEOUT = (5, 30)
+
 # ---------- Helpers ----------
 def require_auth(f):
     @wraps(f)
     def wrapper(*args, **kwargs):
-        # session token or Authorization header (Bearer <token>)
-        token = session.get("access_token") or request.headers.get("Authorization")
+        # server-side token id in the session, or Authorization header (Bearer <token>)
+        token = session.get("token_id") or request.headers.get("Authorization")
         if not token:
             return jsonify({"error": "unauthorized"}), 401
         return f(*args, **kwargs)
@@ -61,7 +71,6 @@ def discord_oauth_url(state=None, scopes=None):
     return f"https://discord.com/api/oauth2/authorize?{urlencode(params)}"
 
 def exchange_code_for_token(code):
-    url = "https://discord.com/api/oauth2/token"
     data = {
         "client_id": DISCORD_CLIENT_ID,
         "client_secret": DISCORD_CLIENT_SECRET,
@@ -70,75 +79,70 @@ def exchange_code_for_token(code):
         "redirect_uri": OAUTH_REDIRECT,
     }
     headers = {"Content-Type": "application/x-www-form-urlencoded"}
-    resp = requests.post(url, data=data, headers=headers)
+    resp = discord.request("POST", "/oauth2/token", data=data, headers=headers)
     return resp.json()
 
 def get_user_guilds(access_token):
     headers = {"Authorization": f"Bearer {access_token}"}
-    resp = requests.get("https://discord.com/api/v10/users/@me/guilds", headers=headers)
-    return resp.json()
+    # heavily rate-limited: fail fast and let the cache serve a stale list
+    return discord.json("GET", "/users/@me/guilds", headers=headers, max_retry_after=2)
 
 def bot_api_get(path):
     """Helper to GET Discord API with bot token. path is after /api"""
     headers = {"Authorization": f"Bot {DISCORD_BOT_TOKEN}"}
-    url = f"https://discord.com/api/v10{path}"
-    r = requests.get(url, headers=headers)
-    if r.status_code >= 400:
-        raise Exception(f"Discord GET {url} failed: {r.status_code} {r.text}")
-    return r.json()
+    return discord.json("GET", path, headers=headers)
 
 def bot_api_post(path, json_body):
-    headers = {"Authorization": f"Bot {DISCORD_BOT_TOKEN}", "Content-Type": "application/json"}
-    url = f"https://discord.com/api/v10{path}"
-    r = requests.post(url, headers=headers, json=json_body)
-    if r.status_code >= 400:
-        raise Exception(f"Discord POST {url} failed: {r.status_code} {r.text}")
-    return r.json()
-
-def save_backup_to_supabase(guild_id, snapshot):
-    if not SUPABASE_URL or not SUPABASE_KEY:
-        return False, "Supabase not configured"
-    # Assumes a table named server_backups with columns (guild_id text, snapshot json)
-    url = f"{SUPABASE_URL}/rest/v1/server_backups"
-    headers = {
-        "apikey": SUPABASE_KEY,
-        "Authorization": f"Bearer {SUPABASE_KEY}",
-        "Content-Type": "application/json",
-        "Prefer": "return=representation"
-    }
-    payload = {"guild_id": guild_id, "snapshot": snapshot}
-    r = requests.post(url, headers=headers, json=payload)
-    if r.status_code in (200,201):
-        return True, r.json()
-    return False, r.text
-
-def get_backup_from_supabase(guild_id):
-    if not SUPABASE_URL or not SUPABASE_KEY:
-        return None
-    url = f"{SUPABASE_URL}/rest/v1/server_backups?guild_id=eq.{guild_id}"
-    headers = {"apikey": SUPABASE_KEY, "Authorization": f"Bearer {SUPABASE_KEY}"}
-    r = requests.get(url, headers=headers)
-    if r.status_code != 200:
-        return None
-    arr = r.json()
-    return arr[-1] if arr else None
+    headers = {"Authorization": f"Bot {DISCORD_BOT_TOKEN}"}
+    return discord.json("POST", path, headers=headers, json=json_body)
 
-# Local fallback storage folder
+def bot_api(method, path, json_body=None):
+    headers = {"Authorization": f"Bot {DISCORD_BOT_TOKEN}"}
+    return discord.json(method, path, headers=headers, json=json_body)
+
+# Server-side OAuth tokens and the per-token guild list cache
+oauth_tokens = OAuthTokenStore(discord, DISCORD_CLIENT_ID, DISCORD_CLIENT_SECRET)
+guild_cache = GuildListCache(get_user_guilds, ttl=GUILD_CACHE_TTL)
+
+# Versioned backups: Supabase when configured, local JSON files as fallback
 BACKUP_FOLDER = os.path.join(os.path.dirname(__file__), "backups")
 os.makedirs(BACKUP_FOLDER, exist_ok=True)
+BACKUP_RETENTION = int(os.getenv("BACKUP_RETENTION", 30))
+RESTORE_CONCURRENCY = int(os.getenv("RESTORE_CONCURRENCY", 8))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+
+local_backups = BackupStore(LocalBackupBackend(BACKUP_FOLDER), retention=BACKUP_RETENTION)
+remote_backups = (
+    BackupStore(SupabaseBackupBackend(http, SUPABASE_URL, SUPABASE_KEY), retention=BACKUP_RETENTION)
+    if SUPABASE_URL and SUPABASE_KEY else None
+)
+
+def backup_stores():
+    return [store for store in (remote_backups, local_backups) if store is not None]
+
+def save_backup(guild_id, snapshot):
+    """Store a new backup version. Returns (saved_to, record)."""
+    if remote_backups:
+        try:
+            return "supabase", remote_backups.save(guild_id, snapshot)
+        except Exception as e:
+            print(f"Supabase backup failed for {guild_id}, saving locally: {e}")
+    return "local", local_backups.save(guild_id, snapshot)
 
-def save_backup_local(guild_id, snapshot):
-    path = os.path.join(BACKUP_FOLDER, f"{guild_id}.json")
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(snapshot, f, ensure_ascii=False, indent=2)
-    return path
-
-def load_backup_local(guild_id):
-    path = os.path.join(BACKUP_FOLDER, f"{guild_id}.json")
-    if not os.path.exists(path):
-        return None
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+def load_backup(guild_id, at=None):
+    """Latest snapshot (or the latest at/before unix time ``at``), Supabase first."""
+    for store in backup_stores():
+        try:
+            snapshot = store.load(guild_id, at)
+        except Exception as e:
+            print(f"Loading backup for {guild_id} failed: {e}")
+            continue
+        if snapshot:
+            # backups taken before webhook secrets were stripped may still hold them
+            if snapshot.get("webhooks"):
+                snapshot["webhooks"] = strip_webhook_secrets(snapshot["webhooks"])
+            return snapshot
+    return None
 
 # ---------- Routes: OAuth ----------
 @app.route("/api/auth/url")
@@ -153,153 +157,205 @@ def auth_callback():
     token_data = exchange_code_for_token(code)
     access_token = token_data.get("access_token")
     if not access_token:
-        return jsonify(token_data), 400
-    session["access_token"] = access_token
+        return jsonify({"error": "oauth_failed", "details": token_data.get("error_description")}), 400
+    # the session cookie is signed, not encrypted: it only carries the row id
+    session.pop("access_token", None)
+    session["token_id"] = oauth_tokens.save(token_data)
     return redirect(FRONTEND_ORIGIN)
 
+def current_access_token():
+    """The caller's Discord access token, refreshed first if it is about to expire"""
+    token_id = session.get("token_id")
+    if token_id:
+        token = oauth_tokens.access_token(token_id)
+        if token is None:
+            session.clear()
+        return token
+    header = request.headers.get("Authorization", "")
+    if header.startswith("Bearer "):
+        header = header[len("Bearer "):]
+    return header or None
+
+def bot_presence(guild_id):
+    """True/False from the bot's gateway cache; None when this process cannot tell"""
+    bot = app.config.get("DISCORD_BOT")
+    if bot is None or not bot.is_ready() or not owns_guild(int(guild_id)):
+        return None
+    return bot.get_guild(int(guild_id)) is not None
+
 # ---------- Simple protected route: list guilds ----------
 @app.route("/api/me/guilds")
 @require_auth
 def api_guilds():
-    token = session.get("access_token") or request.headers.get("Authorization")
-    guilds = get_user_guilds(token)
-    return jsonify(guilds)
+    """
+    Cached per token for GUILD_CACHE_TTL seconds; send If-None-Match to get a 304 when unchanged.
+    Each guild carries "bot_present" (true/false, or null when unknown).
+    """
+    try:
+        # a refresh can hit Discord too, so it gets the same error handling
+        token = current_access_token()
+        if not token:
+            return jsonify({"error": "unauthorized"}), 401
+        guilds = guild_cache.get(token)
+    except DiscordAPIError as e:
+        if e.status == 401:
+            session.clear()
+            return jsonify({"error": "unauthorized"}), 401
+        if e.status == 429:
+            retry_after = max(int(e.retry_after or 1), 1)
+            resp = jsonify({"error": "rate_limited", "retry_after": retry_after})
+            resp.headers["Retry-After"] = str(retry_after)
+            return resp, 429
+        print(f"Fetching user guilds failed: {e}")
+        return jsonify({"error": "discord_unavailable"}), 502
+    except Exception as e:
+        print(f"Fetching user guilds failed: {e}")
+        return jsonify({"error": "discord_unavailable"}), 502
+
+    body = [dict(guild, bot_present=bot_presence(guild["id"])) for guild in guilds]
+    resp = jsonify(body)
+    resp.set_etag(hashlib.sha1(resp.get_data()).hexdigest())
+    resp.headers["Cache-Control"] = "private, no-cache"
+    return resp.make_conditional(request)
 
 # ---------- Backup: FULL server snapshot ----------
 @app.route("/api/guilds/<guild_id>/backup", methods=["GET","POST"])
 @require_auth
 def backup_guild(guild_id):
     """
-    GET -> returns existing backup (from Supabase or local)
-    POST -> create & store a fresh backup snapshot by calling Discord API (bot token required)
+    GET -> returns the latest backup (from Supabase or local); ?at=<unix time> for point-in-time
+    POST -> queue a job that creates & stores a fresh backup snapshot by calling Discord API (bot token required)
     """
     if request.method == "GET":
-        # try supabase first
-        sb = get_backup_from_supabase(guild_id)
-        if sb:
-            return jsonify(sb)
-        local = load_backup_local(guild_id)
-        if local:
-            return jsonify({"guild_id": guild_id, "snapshot": local})
+        at = request.args.get("at", type=int)
+        snapshot = load_backup(guild_id, at)
+        if snapshot:
+            return jsonify({"guild_id": guild_id, "snapshot": snapshot})
         return jsonify({"error": "no backup found"}), 404
 
-    # POST: create snapshot
-    try:
-        # fetch guild metadata
-        guild_info = bot_api_get(f"/guilds/{guild_id}")
-        roles = bot_api_get(f"/guilds/{guild_id}/roles")
-        channels = bot_api_get(f"/guilds/{guild_id}/channels")
-        emojis = bot_api_get(f"/guilds/{guild_id}/emojis")
-        # we capture basic structures and permission_overwrites
-        snapshot = {
-            "guild_info": guild_info,
-            "roles": roles,
-            "channels": channels,
-            "emojis": emojis,
-            "created_at": int(time.time())
-        }
-    except Exception as e:
-        return jsonify({"error": "failed to fetch guild data", "details": str(e)}), 500
-
-    # try saving to Supabase table server_backups
-    ok, res = save_backup_to_supabase(guild_id, snapshot)
-    if ok:
-        return jsonify({"ok": True, "saved_to": "supabase", "data": res}), 201
+    # POST: snapshot and store in the background; poll /api/jobs/<job_id>
+    return submit_job("backup", guild_id)
 
-    # fallback: save local file
-    path = save_backup_local(guild_id, snapshot)
-    return jsonify({"ok": True, "saved_to": "local", "path": path}), 201
+@app.route("/api/guilds/<guild_id>/backups")
+@require_auth
+def list_backups(guild_id):
+    """Stored versions, oldest first, with per-part change counts"""
+    for store in backup_stores():
+        try:
+            versions = store.versions(guild_id)
+        except Exception as e:
+            print(f"Listing backups for {guild_id} failed: {e}")
+            continue
+        if versions:
+            return jsonify({"guild_id": guild_id, "versions": versions})
+    return jsonify({"guild_id": guild_id, "versions": []})
 
 # ---------- Restore from backup (DANGEROUS) ----------
+def plan_guild_restore(guild_id, snapshot, id_map=None):
+    """Diff the snapshot against the live guild (2 REST calls)"""
+    live_roles = bot_api_get(f"/guilds/{guild_id}/roles")
+    live_channels = bot_api_get(f"/guilds/{guild_id}/channels")
+    return plan_restore(guild_id, snapshot, live_roles, live_channels, id_map)
+
 @app.route("/api/guilds/<guild_id>/restore", methods=["POST"])
 @require_auth
 def restore_guild(guild_id):
     """
     Restores a guild from the latest snapshot stored.
-    Expect JSON body: {"confirm": true}
-    WARNING: This performs destructive actions (creates roles/channels). Confirm explicitly.
+    Expect JSON body: {"confirm": true}, optionally "at": <unix time> to restore an older version
+    Only missing roles/channels are created and only changed ones edited, so it is safe to retry.
+    "resume": true reuses the id map of the previous run; "dry_run": true returns the plan only.
+    Runs as a background job: returns {"job_id"}, poll /api/jobs/<job_id>.
+    WARNING: This performs destructive actions (creates/edits roles and channels). Confirm explicitly.
     """
     body = request.json or {}
-    if not body.get("confirm"):
+    if not body.get("confirm") and not body.get("dry_run"):
         return jsonify({"error": "operation not confirmed. send {\"confirm\": true} to proceed."}), 400
 
-    # load snapshot (supabase first then local)
-    sb = get_backup_from_supabase(guild_id)
-    snapshot = None
-    if sb and isinstance(sb, (list, dict)):
-        # supabase row might be list; normalize
-        if isinstance(sb, list) and len(sb) > 0:
-            snapshot = sb[-1].get("snapshot")
-        elif isinstance(sb, dict):
-            snapshot = sb.get("snapshot")
-    if not snapshot:
-        snapshot = load_backup_local(guild_id)
+    # NOTE: The restore process requires the bot to have MANAGE_ROLES, MANAGE_CHANNELS permissions in the target guild.
+    if body.get("dry_run"):
+        snapshot = load_backup(guild_id, body.get("at"))
+        if not snapshot:
+            return jsonify({"error": "no backup found for this guild"}), 404
+        previous = jobs.latest_result(guild_id, "restore") if body.get("resume") else None
+        try:
+            plan = plan_guild_restore(guild_id, snapshot, (previous or {}).get("id_map"))
+        except Exception as e:
+            return jsonify({"error": "failed to read the live guild", "details": str(e)}), 500
+        return jsonify({"ok": True, "planned": plan.summary(), "ops": [op.report() for op in plan.ops.values()]})
+
+    return submit_job("restore", guild_id, {"at": body.get("at"), "resume": bool(body.get("resume"))})
+
+# ---------- Background jobs (backup / restore) ----------
+jobs = JobQueue(workers=JOB_WORKERS)
+
+def run_backup_job(job):
+    guild_id = job.guild_id
+    parts_total = len(SNAPSHOT_PARTS) + 1
+    fetched = []
+
+    def on_part(key):
+        fetched.append(key)
+        job.progress({"stage": "fetching", "done": len(fetched), "total": parts_total})
+
+    # guild metadata, roles, channels (with permission_overwrites), emojis,
+    # stickers, webhooks and member role assignments, fetched in parallel
+    snapshot = fetch_snapshot(bot_api_get, guild_id, progress=on_part)
+    job.check_cancelled()
+    job.progress({"stage": "saving", "done": parts_total, "total": parts_total}, force=True)
+    saved_to, record = save_backup(guild_id, snapshot)
+    return {"ok": True, "saved_to": saved_to, "backup": backup_summary(record)}
+
+def run_restore_job(job):
+    guild_id = job.guild_id
+    snapshot = load_backup(guild_id, job.params.get("at"))
     if not snapshot:
-        return jsonify({"error": "no backup found for this guild"}), 404
+        raise LookupError("no backup found for this guild")
+    previous = jobs.latest_result(guild_id, "restore") if job.params.get("resume") else None
+    plan = plan_guild_restore(guild_id, snapshot, (previous or {}).get("id_map"))
+    total = len(plan.ops)
+    finished = []
 
-    # NOTE: The restore process requires the bot to have MANAGE_ROLES, MANAGE_CHANNELS permissions in the target guild.
-    # We'll attempt to recreate roles (skipping @everyone) then channels with basic perms.
-    created = {"roles": [], "channels": []}
-    try:
-        # restore roles
-        for r in snapshot.get("roles", []):
-            # skip @everyone (id == guild_id usually)
-            if r.get("name", "").lower() == "@everyone":
-                continue
-            payload = {
-                "name": r.get("name", "role"),
-                "permissions": str(r.get("permissions", 0)),
-                "mentionable": r.get("mentionable", False),
-                "hoist": r.get("hoist", False)
-            }
-            try:
-                new_role = bot_api_post(f"/guilds/{guild_id}/roles", payload)
-                created["roles"].append(new_role)
-            except Exception as e:
-                # best-effort: continue and capture error
-                created.setdefault("role_errors", []).append({"role": r.get("name"), "error": str(e)})
-
-        # restore channels (categories & their children)
-        # We'll create categories first, then other channels with parent
-        # Map old category ids to new category ids using names
-        category_map = {}
-        for ch in snapshot.get("channels", []):
-            if ch.get("type") == 4:  # CATEGORY
-                payload = {"name": ch.get("name", "category"), "type": 4}
-                try:
-                    nc = bot_api_post(f"/guilds/{guild_id}/channels", payload)
-                    category_map[ch.get("id")] = nc.get("id")
-                    created["channels"].append(nc)
-                except Exception as e:
-                    created.setdefault("channel_errors", []).append({"channel": ch.get("name"), "error": str(e)})
-
-        # now other channels
-        for ch in snapshot.get("channels", []):
-            if ch.get("type") == 4:
-                continue
-            payload = {
-                "name": ch.get("name", "channel"),
-                "type": ch.get("type", 0),
-                "topic": ch.get("topic", ""),
-                "nsfw": ch.get("nsfw", False)
-            }
-            parent_id = ch.get("parent_id")
-            if parent_id:
-                new_parent = category_map.get(parent_id)
-                if new_parent:
-                    payload["parent_id"] = new_parent
-            try:
-                nc = bot_api_post(f"/guilds/{guild_id}/channels", payload)
-                created["channels"].append(nc)
-            except Exception as e:
-                created.setdefault("channel_errors", []).append({"channel": ch.get("name"), "error": str(e)})
+    def on_op(op):
+        finished.append(op.key)
+        job.progress({"stage": "restoring", "done": len(finished), "total": total}, partial=restore_report(plan))
 
-    except Exception as e:
-        return jsonify({"error": "restore failed during operations", "details": str(e), "partial": created}), 500
+    job.progress({"stage": "restoring", "done": 0, "total": total}, partial=restore_report(plan), force=True)
+    return execute_plan(plan, bot_api, concurrency=RESTORE_CONCURRENCY, progress=on_op, cancelled=job.cancelled)
 
-    return jsonify({"ok": True, "created": created})
+jobs.register("backup", run_backup_job)
+jobs.register("restore", run_restore_job)
+# Workers are started by the process serving HTTP (web.create_app), not on import
+
+def submit_job(kind, guild_id, params=None):
+    job, created = jobs.submit(kind, guild_id, params)
+    return jsonify({"ok": True, "job_id": job["id"], "status": job["status"], "deduplicated": not created}), 202
+
+@app.route("/api/jobs/<job_id>")
+@require_auth
+def job_status(job_id):
+    """status, progress and (partial) result of a backup/restore job"""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "job not found"}), 404
+    return jsonify(job)
+
+@app.route("/api/jobs/<job_id>/cancel", methods=["POST"])
+@require_auth
+def cancel_job(job_id):
+    job = jobs.cancel(job_id)
+    if job is None:
+        return jsonify({"error": "job not found"}), 404
+    return jsonify(job)
+
+@app.route("/api/guilds/<guild_id>/jobs")
+@require_auth
+def guild_jobs(guild_id):
+    return jsonify({"guild_id": guild_id, "jobs": jobs.list(guild_id)})
 
 # ---------- Auto-translate endpoint (Libre default) ----------
+MAX_BATCH_TEXTS = 500
+
 @app.route("/api/translate", methods=["POST"])
 @require_auth
 def translate():
@@ -311,24 +367,42 @@ def translate():
     target = body.get("target", "en")
     if not text:
         return jsonify({"error": "no text provided"}), 400
+    try:
+        translated = translator.translate(text, target)
+    except TranslationError as e:
+        return jsonify({"error": str(e)}), 500
+    body = {"translated": translated}
+    # google/deepl used to return the raw provider JSON; keep those fields for existing clients
+    if translator.provider == "google":
+        body["data"] = {"translations": [{"translatedText": translated}]}
+    elif translator.provider == "deepl":
+        body["translations"] = [{"text": translated}]
+    return jsonify(body)
+
+@app.route("/api/translate/batch", methods=["POST"])
+@require_auth
+def translate_batch():
+    """
+    payload: {texts: [str, ...], target: 'en'|'fr'...}
+    Duplicates are translated once; cached strings never reach the provider.
+    """
+    body = request.json or {}
+    texts = body.get("texts") or []
+    target = body.get("target", "en")
+    if not isinstance(texts, list) or not texts or not all(isinstance(t, str) for t in texts):
+        return jsonify({"error": "texts must be a non-empty list of strings"}), 400
+    if len(texts) > MAX_BATCH_TEXTS:
+        return jsonify({"error": f"at most {MAX_BATCH_TEXTS} texts per request"}), 400
+    try:
+        return jsonify({"translations": translator.translate_many(texts, target)})
+    except TranslationError as e:
+        return jsonify({"error": str(e)}), 500
 
-    provider = TRANSLATE_PROVIDER.lower()
-    if provider == "libre" and TRANSLATOR_AVAILABLE:
-        try:
-            translated = LibreTranslator(source="auto", target=target).translate(text)
-            return jsonify({"translated": translated})
-        except Exception as e:
-            return jsonify({"error": str(e)}), 500
-    elif provider == "google" and GOOGLE_API_KEY:
-        url = f"https://translation.googleapis.com/language/translate/v2?key={GOOGLE_API_KEY}"
-        resp = requests.post(url, json={"q": text, "target": target})
-        return jsonify(resp.json())
-    elif provider == "deepl" and DEEPL_API_KEY:
-        url = "https://api-free.deepl.com/v2/translate"
-        resp = requests.post(url, data={"auth_key": DEEPL_API_KEY, "text": text, "target_lang": target.upper()})
-        return jsonify(resp.json())
-    else:
-        return jsonify({"error": "no translator configured or missing API key"}), 500
+@app.route("/api/translate/stats")
+@require_auth
+def translate_stats():
+    """cache hit ratio and provider latency"""
+    return jsonify({"provider": translator.provider, **translator.stats.snapshot()})
 
 # ---------- Suspicious account checker helper ----------
 @app.route("/api/check_account", methods=["POST"])
@@ -373,17 +447,18 @@ def health():
 @app.route("/api/guilds/<guild_id>/backup/download")
 @require_auth
 def download_backup(guild_id):
-    local = os.path.join(BACKUP_FOLDER, f"{guild_id}.json")
-    if os.path.exists(local):
-        return send_file(local, as_attachment=True)
-    sb = get_backup_from_supabase(guild_id)
-    if sb:
-        # return the JSON payload
-        return jsonify(sb)
-    return jsonify({"error": "no backup found"}), 404
+    snapshot = load_backup(guild_id, request.args.get("at", type=int))
+    if not snapshot:
+        return jsonify({"error": "no backup found"}), 404
+    resp = jsonify(snapshot)
+    resp.headers["Content-Disposition"] = f"attachment; filename={guild_id}.json"
+    return resp
 
 # ---------- Run Flask dev (for local testing) ----------
+# Run from the repo root with `python -m backend.app`
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 10000))
     print("Starting backend on port", port)
+    # no web.create_app here, so start the backup/restore workers ourselves
+    jobs.start()
     app.run(host="0.0.0.0", port=port)
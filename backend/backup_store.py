@@ -0,0 +1,447 @@
+# backend/backup_store.py
+"""Versioned, content-addressed guild backups.
+
+Every role, channel, emoji, sticker and webhook is stored once per guild as
+an object keyed by the SHA-256 of its canonical JSON. A backup version is a
+small manifest mapping item ids to object hashes. The first version (and
+every ``full_every``-th after it) lists every item; the others only list the
+items that changed or were removed since the previous version. A snapshot is
+rebuilt by folding the manifests from the nearest full version forward.
+
+Supabase schema (applied by supabase/migrations/20261018000000_versioned_backups.sql,
+which also upgrades an existing ``server_backups`` table)::
+
+    create table server_backups (
+        id bigint generated always as identity primary key,
+        guild_id text not null,
+        version bigint,
+        snapshot jsonb not null,
+        created_at timestamptz not null default now()
+    );
+    create index on server_backups (guild_id, created_at desc);
+    create index on server_backups (guild_id, version);
+    create table backup_objects (
+        guild_id text not null,
+        hash text not null,
+        data jsonb not null,
+        primary key (guild_id, hash)
+    );
+
+Rows written before versioning have no ``version`` and hold a full snapshot;
+they are still returned as-is when they are the newest.
+"""
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+FORMAT = "cas-v1"
+LIST_PARTS = ("roles", "channels", "emojis", "stickers", "webhooks")
+BLOB_PARTS = ("guild_info", "member_roles")
+OBJECT_BATCH = 100
+
+
+def content_hash(obj):
+    data = json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def index_snapshot(snapshot):
+    """Split a snapshot into a full manifest ``{part: {id: hash}}`` and its objects."""
+    manifest, objects = {}, {}
+    for part in LIST_PARTS:
+        entries = {}
+        for item in snapshot.get(part) or []:
+            digest = content_hash(item)
+            objects[digest] = item
+            entries[str(item["id"])] = digest
+        manifest[part] = entries
+    for part in BLOB_PARTS:
+        if part in snapshot:
+            digest = content_hash(snapshot[part])
+            objects[digest] = snapshot[part]
+            manifest[part] = digest
+    return manifest, objects
+
+
+def manifest_hashes(manifest):
+    hashes = set()
+    for entries in manifest.values():
+        if isinstance(entries, dict):
+            hashes.update(entries.values())
+        else:
+            hashes.add(entries)
+    return hashes
+
+
+def diff_manifests(old, new):
+    changed, removed = {}, {}
+    for part, entries in new.items():
+        before = old.get(part)
+        if isinstance(entries, dict):
+            before = before or {}
+            delta = {item_id: digest for item_id, digest in entries.items() if before.get(item_id) != digest}
+            gone = [item_id for item_id in before if item_id not in entries]
+            if delta:
+                changed[part] = delta
+            if gone:
+                removed[part] = gone
+        elif before != entries:
+            changed[part] = entries
+    return changed, removed
+
+
+def apply_record(manifest, record):
+    if record["full"]:
+        return {part: dict(e) if isinstance(e, dict) else e for part, e in record["parts"].items()}
+    result = {part: dict(e) if isinstance(e, dict) else e for part, e in manifest.items()}
+    for part, entries in record["parts"].items():
+        if isinstance(entries, dict):
+            result.setdefault(part, {}).update(entries)
+        else:
+            result[part] = entries
+    for part, item_ids in record.get("removed", {}).items():
+        for item_id in item_ids:
+            result.get(part, {}).pop(item_id, None)
+    for part, item_ids in record.get("order", {}).items():
+        entries = result.get(part, {})
+        result[part] = {item_id: entries[item_id] for item_id in item_ids}
+    return result
+
+
+def is_versioned(record):
+    return isinstance(record, dict) and record.get("format") == FORMAT
+
+
+def summary(record):
+    if not is_versioned(record):
+        return {"version": None, "created_at": record.get("created_at"), "full": True, "legacy": True}
+    return {
+        "version": record["version"],
+        "created_at": record["created_at"],
+        "full": record["full"],
+        "changed": {part: len(e) if isinstance(e, dict) else 1 for part, e in record["parts"].items()},
+        "removed": {part: len(ids) for part, ids in record.get("removed", {}).items()},
+    }
+
+
+class BackupStore:
+    """Writes delta versions and rebuilds snapshots on top of a storage backend."""
+
+    def __init__(self, backend, retention=30, full_every=10):
+        self.backend = backend
+        self.retention = retention
+        self.full_every = full_every
+
+    def save(self, guild_id, snapshot):
+        parent = self.backend.latest(guild_id)
+        manifest, objects = index_snapshot(snapshot)
+        version = int(time.time() * 1000)
+        record = {
+            "format": FORMAT,
+            "version": version,
+            "created_at": snapshot.get("created_at", int(time.time())),
+            "base": None,
+            "depth": 0,
+            "full": True,
+            "parts": manifest,
+        }
+        known = set()
+        if is_versioned(parent) and parent["depth"] + 1 < self.full_every:
+            parent_manifest = self.manifest(guild_id, parent)
+            changed, removed = diff_manifests(parent_manifest, manifest)
+            known = manifest_hashes(parent_manifest)
+            record.update(
+                version=max(version, parent["version"] + 1),
+                base=parent["version"],
+                depth=parent["depth"] + 1,
+                full=False,
+                parts=changed,
+                removed=removed,
+            )
+            # Items are listed in snapshot order; record it only where it moved
+            rebuilt = apply_record(parent_manifest, record)
+            order = {
+                part: list(entries) for part, entries in manifest.items()
+                if isinstance(entries, dict) and list(rebuilt.get(part, {})) != list(entries)
+            }
+            if order:
+                record["order"] = order
+        if snapshot.get("errors"):
+            record["errors"] = snapshot["errors"]
+        self.backend.put_objects(guild_id, {h: o for h, o in objects.items() if h not in known})
+        self.backend.put(guild_id, record)
+        if self.retention:
+            self.compact(guild_id, self.retention)
+        return record
+
+    def manifest(self, guild_id, record):
+        manifest = {}
+        for entry in self.backend.chain(guild_id, record):
+            manifest = apply_record(manifest, entry)
+        return manifest
+
+    def load(self, guild_id, at=None):
+        """Rebuild the newest snapshot, or the newest one taken at or before ``at`` (unix time)."""
+        record = self.backend.latest(guild_id, before=at)
+        if record is None or not is_versioned(record):
+            return record
+        manifest = self.manifest(guild_id, record)
+        objects = self.backend.get_objects(guild_id, manifest_hashes(manifest))
+        snapshot = {}
+        for part, entries in manifest.items():
+            if isinstance(entries, dict):
+                snapshot[part] = [objects[digest] for digest in entries.values()]
+            else:
+                snapshot[part] = objects[entries]
+        snapshot["created_at"] = record["created_at"]
+        snapshot["version"] = record["version"]
+        if record.get("errors"):
+            snapshot["errors"] = record["errors"]
+        return snapshot
+
+    def versions(self, guild_id):
+        return [summary(record) for record in self.backend.versions(guild_id)]
+
+    def compact(self, guild_id, keep):
+        """Keep the newest ``keep`` versions and drop objects nothing references."""
+        records = self.backend.versions(guild_id)
+        if len(records) <= keep:
+            return 0
+        oldest = records[-keep]
+        if is_versioned(oldest) and not oldest["full"]:
+            oldest = dict(oldest, parts=self.manifest(guild_id, oldest), full=True, base=None, depth=0)
+            oldest.pop("removed", None)
+            oldest.pop("order", None)
+            self.backend.replace(guild_id, oldest)
+        dropped = records[:-keep]
+        self.backend.delete(guild_id, [r.get("version") for r in dropped])
+
+        referenced = set()
+        for record in [oldest] + records[len(records) - keep + 1:]:
+            if is_versioned(record):
+                referenced |= manifest_hashes(record["parts"])
+        unused = self.backend.object_hashes(guild_id) - referenced
+        if unused:
+            self.backend.delete_objects(guild_id, unused)
+        return len(dropped)
+
+
+# -----------------------
+# Backends
+# -----------------------
+def _walk_chain(by_version, record):
+    chain = [record]
+    while not chain[-1]["full"]:
+        base = by_version.get(chain[-1]["base"])
+        if base is None:
+            raise LookupError(f"backup version {chain[-1]['base']} is missing")
+        chain.append(base)
+    chain.reverse()
+    return chain
+
+
+def _chunks(items, size=OBJECT_BATCH):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class LocalBackupBackend:
+    """Stores versions and objects as JSON files under ``root/<guild_id>/``.
+
+    A pre-versioning ``root/<guild_id>.json`` is returned as the latest
+    snapshot until the first versioned backup is written.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def _dir(self, guild_id, kind, create=False):
+        path = os.path.join(self.root, str(guild_id), kind)
+        if create:
+            os.makedirs(path, exist_ok=True)
+        return path
+
+    @staticmethod
+    def _list(folder):
+        return [n[:-5] for n in os.listdir(folder) if n.endswith(".json")] if os.path.isdir(folder) else []
+
+    @staticmethod
+    def _read(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def _write(path, data):
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def _version_files(self, guild_id):
+        folder = self._dir(guild_id, "versions")
+        names = sorted(int(n) for n in self._list(folder))
+        return [os.path.join(folder, f"{n}.json") for n in names]
+
+    def _legacy(self, guild_id):
+        path = os.path.join(self.root, f"{guild_id}.json")
+        return self._read(path) if os.path.exists(path) else None
+
+    def versions(self, guild_id):
+        return [self._read(path) for path in self._version_files(guild_id)]
+
+    def latest(self, guild_id, before=None):
+        for path in reversed(self._version_files(guild_id)):
+            record = self._read(path)
+            if before is None or record["created_at"] <= before:
+                return record
+        legacy = self._legacy(guild_id)
+        if legacy and (before is None or legacy.get("created_at", 0) <= before):
+            return legacy
+        return None
+
+    def chain(self, guild_id, record):
+        return _walk_chain({r["version"]: r for r in self.versions(guild_id)}, record)
+
+    def put(self, guild_id, record):
+        self._write(os.path.join(self._dir(guild_id, "versions", create=True), f"{record['version']}.json"), record)
+
+    replace = put
+
+    def delete(self, guild_id, versions):
+        folder = self._dir(guild_id, "versions")
+        for version in versions:
+            if version is None:
+                legacy = os.path.join(self.root, f"{guild_id}.json")
+                if os.path.exists(legacy):
+                    os.remove(legacy)
+                continue
+            path = os.path.join(folder, f"{version}.json")
+            if os.path.exists(path):
+                os.remove(path)
+
+    def put_objects(self, guild_id, objects):
+        folder = self._dir(guild_id, "objects", create=True)
+        for digest, obj in objects.items():
+            path = os.path.join(folder, f"{digest}.json")
+            if not os.path.exists(path):
+                self._write(path, obj)
+
+    def get_objects(self, guild_id, hashes):
+        folder = self._dir(guild_id, "objects")
+        return {digest: self._read(os.path.join(folder, f"{digest}.json")) for digest in hashes}
+
+    def object_hashes(self, guild_id):
+        return set(self._list(self._dir(guild_id, "objects")))
+
+    def delete_objects(self, guild_id, hashes):
+        folder = self._dir(guild_id, "objects")
+        for digest in hashes:
+            path = os.path.join(folder, f"{digest}.json")
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class SupabaseBackupBackend:
+    """Stores versions in ``server_backups`` and objects in ``backup_objects``."""
+
+    PAGE = 1000
+
+    def __init__(self, session, url, key, timeout=(5, 30)):
+        self.session = session
+        self.base = f"{url}/rest/v1"
+        self.key = key
+        self.timeout = timeout
+
+    def _request(self, method, table, params=None, json_body=None, prefer=None):
+        headers = {"apikey": self.key, "Authorization": f"Bearer {self.key}"}
+        if prefer:
+            headers["Prefer"] = prefer
+        r = self.session.request(
+            method, f"{self.base}/{table}", params=params, json=json_body, headers=headers, timeout=self.timeout
+        )
+        if r.status_code >= 400:
+            raise Exception(f"Supabase {method} {table} failed: {r.status_code} {r.text}")
+        return r.json() if r.content else None
+
+    def _select_all(self, table, params):
+        rows, offset = [], 0
+        while True:
+            page = self._request("GET", table, dict(params, limit=self.PAGE, offset=offset))
+            rows.extend(page)
+            if len(page) < self.PAGE:
+                return rows
+            offset += self.PAGE
+
+    def versions(self, guild_id):
+        rows = self._select_all("server_backups", {
+            "guild_id": f"eq.{guild_id}", "select": "snapshot", "order": "created_at.asc",
+        })
+        return [row["snapshot"] for row in rows]
+
+    def latest(self, guild_id, before=None):
+        params = {"guild_id": f"eq.{guild_id}", "select": "snapshot", "order": "created_at.desc", "limit": 1}
+        if before is not None:
+            params["created_at"] = f"lte.{datetime.fromtimestamp(before, timezone.utc).isoformat()}"
+        rows = self._request("GET", "server_backups", params)
+        return rows[0]["snapshot"] if rows else None
+
+    def chain(self, guild_id, record):
+        if record["full"]:
+            return [record]
+        # depth bounds the walk back to the full version; the history is linear
+        rows = self._request("GET", "server_backups", {
+            "guild_id": f"eq.{guild_id}",
+            "version": f"lte.{record['version']}",
+            "select": "snapshot",
+            "order": "version.desc",
+            "limit": record["depth"] + 1,
+        })
+        return _walk_chain({row["snapshot"]["version"]: row["snapshot"] for row in rows}, record)
+
+    def put(self, guild_id, record):
+        self._request("POST", "server_backups", json_body={
+            "guild_id": str(guild_id), "version": record["version"], "snapshot": record,
+        }, prefer="return=minimal")
+
+    def replace(self, guild_id, record):
+        self._request("PATCH", "server_backups", {
+            "guild_id": f"eq.{guild_id}", "version": f"eq.{record['version']}",
+        }, json_body={"snapshot": record}, prefer="return=minimal")
+
+    def delete(self, guild_id, versions):
+        if None in versions:
+            self._request("DELETE", "server_backups", {"guild_id": f"eq.{guild_id}", "version": "is.null"})
+        for chunk in _chunks(v for v in versions if v is not None):
+            self._request("DELETE", "server_backups", {
+                "guild_id": f"eq.{guild_id}", "version": f"in.({','.join(map(str, chunk))})",
+            })
+
+    def put_objects(self, guild_id, objects):
+        for chunk in _chunks(objects.items()):
+            self._request(
+                "POST", "backup_objects", {"on_conflict": "guild_id,hash"},
+                json_body=[{"guild_id": str(guild_id), "hash": h, "data": o} for h, o in chunk],
+                prefer="resolution=ignore-duplicates,return=minimal",
+            )
+
+    def get_objects(self, guild_id, hashes):
+        objects = {}
+        for chunk in _chunks(hashes):
+            rows = self._request("GET", "backup_objects", {
+                "guild_id": f"eq.{guild_id}", "hash": f"in.({','.join(chunk)})", "select": "hash,data",
+            })
+            objects.update((row["hash"], row["data"]) for row in rows)
+        return objects
+
+    def object_hashes(self, guild_id):
+        rows = self._select_all("backup_objects", {"guild_id": f"eq.{guild_id}", "select": "hash", "order": "hash"})
+        return {row["hash"] for row in rows}
+
+    def delete_objects(self, guild_id, hashes):
+        for chunk in _chunks(hashes):
+            self._request("DELETE", "backup_objects", {
+                "guild_id": f"eq.{guild_id}", "hash": f"in.({','.join(chunk)})",
+            })
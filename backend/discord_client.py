@@ -0,0 +1,228 @@
+# backend/discord_client.py
+import hashlib
+import random
+import re
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+API_BASE = "https://discord.com/api/v10"
+DEFAULT_TIMEOUT = (5, 15)  # connect, read
+
+# IDs after these path segments are "major parameters": they get their own bucket
+_MAJOR = re.compile(r"/(guilds|channels|webhooks)/(\d+)")
+_ID = re.compile(r"/\d{15,}")
+# Per-user buckets pile up; idle ones are pruned past this many
+MAX_BUCKETS = 10000
+# Methods safe to resend when the first attempt may have reached Discord
+IDEMPOTENT = frozenset(("GET", "HEAD", "OPTIONS", "PUT", "PATCH", "DELETE"))
+
+
+def create_session(pool_size=20):
+    """requests.Session with keep-alive connection pooling."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class DiscordAPIError(Exception):
+    def __init__(self, method, url, status, text, retry_after=None):
+        super().__init__(f"Discord {method} {url} failed: {status} {text}")
+        self.status = status
+        self.text = text
+        self.retry_after = retry_after
+
+
+class _Bucket:
+    """Request budget for one rate-limit bucket.
+
+    Until the first response reports the limits only one request is let
+    through; after that up to ``remaining`` requests run concurrently and
+    the rest wait for the window to reset.
+    """
+
+    __slots__ = ("cond", "limit", "remaining", "reset_at", "inflight")
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.limit = None
+        self.remaining = 1
+        self.reset_at = 0.0
+        self.inflight = 0
+
+    def acquire(self):
+        with self.cond:
+            while True:
+                now = time.time()
+                if self.limit is None:
+                    if self.inflight == 0:
+                        break
+                    self.cond.wait()
+                    continue
+                if self.reset_at <= now and self.remaining <= 0:
+                    self.remaining = self.limit
+                if self.remaining > 0:
+                    break
+                self.cond.wait(self.reset_at - now)
+            self.remaining -= 1
+            self.inflight += 1
+
+    def release(self, headers=None):
+        with self.cond:
+            self.inflight -= 1
+            if headers is not None and "X-RateLimit-Remaining" in headers:
+                self.limit = int(headers.get("X-RateLimit-Limit", 1))
+                # requests still in flight may not be counted in the header yet
+                self.remaining = max(int(headers["X-RateLimit-Remaining"]) - self.inflight, 0)
+                self.reset_at = time.time() + float(headers.get("X-RateLimit-Reset-After", 0))
+            elif self.limit is None:
+                # no rate-limit headers on this route: do not throttle it
+                self.limit = self.remaining = 1 << 30
+            self.cond.notify_all()
+
+
+class DiscordClient:
+    """Shared, thread-safe Discord REST client.
+
+    One pooled session is reused for every call. Requests are throttled per
+    rate-limit bucket using the X-RateLimit-* response headers (routes are
+    keyed by method plus major parameter until Discord reports their bucket
+    hash); requests in the same bucket run concurrently while it has budget.
+    Buckets and global limits are tracked per token, so one user's OAuth
+    calls never hold up another user's or the bot's. 429s wait for
+    ``retry_after``. Idempotent requests are also retried on timeouts and
+    5xx with exponential backoff and jitter; POSTs only on connection
+    errors, so a slow create is never sent twice.
+    """
+
+    def __init__(self, base=API_BASE, timeout=DEFAULT_TIMEOUT, max_retries=3, session=None):
+        self.base = base
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.session = session or create_session()
+        self._lock = threading.Lock()
+        self._route_buckets = {}
+        self._buckets = {}
+        self._global_resets = {}
+
+    @staticmethod
+    def route_key(method, path):
+        path = path.split("?", 1)[0]
+        major = _MAJOR.search(path)
+        template = _ID.sub("/{id}", _MAJOR.sub(r"/\1/{major}", path))
+        return f"{method} {template} {major.group(2) if major else ''}"
+
+    def identity(self, kwargs):
+        """Short hash of the credential a request is made with; rate limits apply per token."""
+        headers = kwargs.get("headers") or {}
+        credential = headers.get("Authorization") or self.session.headers.get("Authorization")
+        data = kwargs.get("data")
+        if not credential and isinstance(data, dict):
+            # /oauth2/token carries the grant in the form body
+            credential = data.get("refresh_token") or data.get("code")
+        if not credential:
+            return "-"
+        return hashlib.sha256(str(credential).encode()).hexdigest()[:16]
+
+    def _bucket(self, route):
+        with self._lock:
+            key = self._route_buckets.get(route, route)
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= MAX_BUCKETS:
+                    self._prune()
+                bucket = self._buckets[key] = _Bucket()
+            return bucket
+
+    def _prune(self):
+        now = time.time()
+        idle = {key for key, bucket in self._buckets.items() if bucket.inflight == 0 and bucket.reset_at <= now}
+        for key in idle:
+            del self._buckets[key]
+        self._route_buckets = {route: key for route, key in self._route_buckets.items() if key not in idle}
+        self._global_resets = {identity: t for identity, t in self._global_resets.items() if t > now}
+
+    def _wait_global(self, identity):
+        delay = self._global_resets.get(identity, 0.0) - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _learn_bucket(self, route, bucket, resp):
+        bucket_hash = resp.headers.get("X-RateLimit-Bucket")
+        if not bucket_hash:
+            return
+        identity, _, rest = route.partition("|")
+        key = f"{identity}|{bucket_hash}:{rest.rsplit(' ', 1)[1]}"
+        with self._lock:
+            if self._route_buckets.get(route) != key:
+                self._route_buckets[route] = key
+                self._buckets.setdefault(key, bucket)
+
+    def request(self, method, path, max_retry_after=None, **kwargs):
+        """Send a request and return the Response (any status).
+
+        A 429 asking to wait longer than ``max_retry_after`` seconds is
+        returned instead of retried, for callers that cannot block that long.
+        """
+        url = path if path.startswith("http") else f"{self.base}{path}"
+        identity = self.identity(kwargs)
+        route = f"{identity}|{self.route_key(method, path)}"
+        idempotent = method.upper() in IDEMPOTENT
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+        while True:
+            bucket = self._bucket(route)
+            self._wait_global(identity)
+            bucket.acquire()
+            try:
+                resp = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                bucket.release()
+                # a read timeout may mean Discord already created the resource
+                retryable = idempotent or isinstance(e, requests.ConnectionError)
+                if attempt >= self.max_retries or not retryable:
+                    raise
+                attempt += 1
+                time.sleep(self._backoff(attempt))
+                continue
+            bucket.release(resp.headers)
+            self._learn_bucket(route, bucket, resp)
+
+            if resp.status_code == 429:
+                retry_after = self._retry_after(resp)
+                if resp.headers.get("X-RateLimit-Global"):
+                    self._global_resets[identity] = time.time() + retry_after
+                if attempt < self.max_retries and (max_retry_after is None or retry_after <= max_retry_after):
+                    attempt += 1
+                    time.sleep(retry_after + random.uniform(0, 0.25))
+                    continue
+            if resp.status_code >= 500 and idempotent and attempt < self.max_retries:
+                attempt += 1
+                time.sleep(self._backoff(attempt))
+                continue
+            return resp
+
+    def json(self, method, path, **kwargs):
+        """Like ``request`` but raises DiscordAPIError on >= 400 and returns the JSON body."""
+        resp = self.request(method, path, **kwargs)
+        if resp.status_code >= 400:
+            retry_after = self._retry_after(resp) if resp.status_code == 429 else None
+            raise DiscordAPIError(method, resp.url, resp.status_code, resp.text, retry_after)
+        if resp.status_code == 204 or not resp.content:
+            return None
+        return resp.json()
+
+    @staticmethod
+    def _retry_after(resp):
+        try:
+            return float(resp.json().get("retry_after", 1))
+        except (ValueError, AttributeError):
+            return float(resp.headers.get("Retry-After", 1))
+
+    @staticmethod
+    def _backoff(attempt):
+        return min(2 ** attempt * 0.25, 5) + random.uniform(0, 0.25)
@@ -0,0 +1,322 @@
+# backend/jobs.py
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+
+from apps.db import get_database
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    guild_id TEXT NOT NULL,
+    dedupe_key TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress TEXT,
+    result TEXT,
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    owner TEXT,
+    heartbeat_at REAL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS jobs_guild ON jobs (guild_id, created_at);
+"""
+
+FINISHED = ("done", "failed", "cancelled")
+
+# Identifies this process as the owner of the jobs it claims: "<pid>:<nonce>".
+# The nonce tells a restarted process apart from a dead one that had the same pid.
+PROCESS_ID = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _dump(value):
+    return None if value is None else json.dumps(value)
+
+
+def _owner_alive(owner):
+    if not owner:
+        return False
+    if owner == PROCESS_ID:
+        return True
+    pid = int(owner.partition(":")[0])
+    if pid == os.getpid():
+        # same pid, different nonce: a previous run of this process
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """Handle passed to a job handler for reporting progress and checking cancellation."""
+
+    def __init__(self, queue, row):
+        self.queue = queue
+        self.id = row["id"]
+        self.kind = row["kind"]
+        self.guild_id = row["guild_id"]
+        self.params = json.loads(row["params"])
+        self.state = {"progress": None, "result": None}
+        self._flushed = 0.0
+
+    def progress(self, progress, partial=None, force=False):
+        """Record progress (and optionally a partial result); persisted at most every ``flush_interval``."""
+        self.state["progress"] = progress
+        if partial is not None:
+            self.state["result"] = partial
+        now = time.monotonic()
+        if force or now - self._flushed >= self.queue.flush_interval:
+            self._flushed = now
+            self.queue.db.execute(
+                "UPDATE jobs SET progress = ?, result = ? WHERE id = ?",
+                (_dump(progress), _dump(self.state["result"]), self.id),
+            )
+
+    def cancelled(self):
+        return self.id in self.queue._cancel
+
+    def check_cancelled(self):
+        if self.cancelled():
+            raise JobCancelled()
+
+
+class JobQueue:
+    """Persistent background jobs for long-running guild operations.
+
+    Jobs are rows in SQLite and are picked up by a small pool of worker
+    threads, so HTTP handlers only enqueue and return a job id. At most one
+    job runs per guild; submitting a job identical to one that is still
+    queued or running returns the existing job. Jobs are claimed with a
+    single UPDATE, so several processes sharing the database never run the
+    same job. The owner renews a lease (``heartbeat_at``) on its running
+    jobs every ``lease / 3`` seconds. A job whose owner process died, or
+    whose lease ran out (e.g. a restart reused the pid), is queued again,
+    so handlers must be safe to re-run.
+    """
+
+    def __init__(self, workers=2, db=None, flush_interval=0.5, lease=60):
+        self.workers = workers
+        self.flush_interval = flush_interval
+        self.lease = lease
+        self.db = db or get_database()
+        self.db.executescript(SCHEMA)
+        columns = {row["name"] for row in self.db.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("owner", "TEXT"), ("heartbeat_at", "REAL")):
+            if column not in columns:
+                self.db.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self._handlers = {}
+        self._running = {}
+        self._cancel = set()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._stopping = False
+        self._stopped = threading.Event()
+
+    def register(self, kind, handler):
+        """``handler(job)`` returns the job's JSON-serialisable result."""
+        self._handlers[kind] = handler
+
+    def start(self):
+        """Start the workers. Call this in the one process that serves HTTP, not at import time."""
+        if self._threads:
+            return
+        self.requeue_orphans()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        thread = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def requeue_orphans(self):
+        """Queue again the running jobs whose owner is gone or whose lease expired. Returns how many."""
+        expired = time.time() - self.lease
+        rows = self.db.execute("SELECT id, owner, heartbeat_at FROM jobs WHERE status = 'running'")
+        requeued = 0
+        for row in rows:
+            if row["owner"] == PROCESS_ID:
+                continue
+            if _owner_alive(row["owner"]) and (row["heartbeat_at"] or 0) >= expired:
+                continue
+            requeued += len(self.db.execute(
+                "UPDATE jobs SET status = 'queued', owner = NULL, started_at = NULL, heartbeat_at = NULL "
+                "WHERE id = ? AND status = 'running' AND owner IS ? AND heartbeat_at IS ? RETURNING id",
+                (row["id"], row["owner"], row["heartbeat_at"]),
+            ))
+        return requeued
+
+    def _heartbeat(self):
+        # own event: waiting on _cond could swallow a submit's notify() meant for a worker
+        while not self._stopped.wait(self.lease / 3):
+            try:
+                self.db.execute(
+                    "UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status = 'running'",
+                    (time.time(), PROCESS_ID),
+                )
+                if self.requeue_orphans():
+                    with self._cond:
+                        self._cond.notify_all()
+            except Exception as e:
+                print(f"Job heartbeat failed: {e}")
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._stopped.set()
+
+    # -----------------------
+    # Submitting / querying
+    # -----------------------
+    @staticmethod
+    def dedupe_key(kind, guild_id, params):
+        data = json.dumps([kind, str(guild_id), params], sort_keys=True)
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    def submit(self, kind, guild_id, params=None):
+        """Queue a job and return ``(job, created)``."""
+        params = params or {}
+        key = self.dedupe_key(kind, guild_id, params)
+        with self._cond:
+            rows = self.db.execute(
+                "SELECT * FROM jobs WHERE dedupe_key = ? AND status IN ('queued', 'running') LIMIT 1", (key,)
+            )
+            if rows:
+                return self._view(rows[0]), False
+            job_id = uuid.uuid4().hex
+            self.db.execute(
+                "INSERT INTO jobs (id, kind, guild_id, dedupe_key, params, status, created_at) "
+                "VALUES (?, ?, ?, ?, ?, 'queued', ?)",
+                (job_id, kind, str(guild_id), key, json.dumps(params), time.time()),
+            )
+            self._cond.notify()
+        return self.get(job_id), True
+
+    def get(self, job_id):
+        rows = self.db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return self._view(rows[0]) if rows else None
+
+    def list(self, guild_id, limit=20):
+        rows = self.db.execute(
+            "SELECT * FROM jobs WHERE guild_id = ? ORDER BY created_at DESC LIMIT ?", (str(guild_id), limit)
+        )
+        return [self._view(row) for row in rows]
+
+    def latest_result(self, guild_id, kind):
+        rows = self.db.execute(
+            "SELECT result FROM jobs WHERE guild_id = ? AND kind = ? AND result IS NOT NULL "
+            "ORDER BY created_at DESC LIMIT 1",
+            (str(guild_id), kind),
+        )
+        return json.loads(rows[0]["result"]) if rows else None
+
+    def cancel(self, job_id):
+        """Cancel a queued job, or ask a running one to stop. Returns the job view or None."""
+        with self._cond:
+            job = self.get(job_id)
+            if job is None or job["status"] in FINISHED:
+                return job
+            if job["status"] == "queued":
+                self.db.execute(
+                    "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                    (time.time(), job_id),
+                )
+            else:
+                self._cancel.add(job_id)
+                self.db.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+        return self.get(job_id)
+
+    def _view(self, row):
+        view = {
+            "id": row["id"],
+            "kind": row["kind"],
+            "guild_id": row["guild_id"],
+            "params": json.loads(row["params"]),
+            "status": row["status"],
+            "progress": json.loads(row["progress"]) if row["progress"] else None,
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "cancel_requested": bool(row["cancel_requested"]),
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+        }
+        running = self._running.get(row["id"])
+        if running is not None and row["status"] == "running":
+            # fresher than the last throttled write
+            view["progress"] = running.state["progress"]
+            view["result"] = running.state["result"]
+        return view
+
+    # -----------------------
+    # Workers
+    # -----------------------
+    def _claim(self):
+        # cancelled while running, then interrupted by a restart
+        self.db.execute(
+            "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE status = 'queued' AND cancel_requested = 1",
+            (time.time(),),
+        )
+        # select and mark running in one statement so two processes cannot claim the same job
+        rows = self.db.execute(
+            "UPDATE jobs SET status = 'running', owner = ?, started_at = ?, heartbeat_at = ? WHERE id = ("
+            "SELECT id FROM jobs WHERE status = 'queued' AND guild_id NOT IN "
+            "(SELECT guild_id FROM jobs WHERE status = 'running') ORDER BY created_at LIMIT 1"
+            ") AND status = 'queued' RETURNING *",
+            (PROCESS_ID, time.time(), time.time()),
+        )
+        if not rows:
+            return None
+        job = Job(self, rows[0])
+        self._running[job.id] = job
+        return job
+
+    def _work(self):
+        while True:
+            with self._cond:
+                job = None
+                while not self._stopping and (job := self._claim()) is None:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+            self._execute(job)
+            with self._cond:
+                self._running.pop(job.id, None)
+                self._cancel.discard(job.id)
+                # the guild is free again, another queued job may now be runnable
+                self._cond.notify_all()
+
+    def _execute(self, job):
+        handler = self._handlers.get(job.kind)
+        status, error, result = "done", None, None
+        try:
+            if handler is None:
+                raise LookupError(f"no handler for job kind {job.kind!r}")
+            result = handler(job)
+            if job.cancelled():
+                status = "cancelled"
+        except JobCancelled:
+            status, result = "cancelled", job.state["result"]
+        except Exception as e:
+            status, error, result = "failed", str(e), job.state["result"]
+        self.db.execute(
+            "UPDATE jobs SET status = ?, progress = ?, result = ?, error = ?, finished_at = ? WHERE id = ? AND owner = ?",
+            (status, _dump(job.state["progress"]), _dump(result), error, time.time(), job.id, PROCESS_ID),
+        )
@@ -0,0 +1,194 @@
+# backend/oauth.py
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import requests
+
+from apps.db import get_database
+from backend.discord_client import DiscordAPIError
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS oauth_tokens (
+    id TEXT PRIMARY KEY,
+    access_token TEXT NOT NULL,
+    refresh_token TEXT,
+    expires_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+# Errors worth serving a stale guild list for instead of failing
+TRANSIENT_STATUSES = (429, 500, 502, 503, 504)
+
+
+def token_key(access_token):
+    return hashlib.sha256(access_token.encode()).hexdigest()
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one execution."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class OAuthTokenStore:
+    """Server-side OAuth tokens, refreshed shortly before they expire.
+
+    The browser session only carries the row id; the refresh token never
+    leaves the server. Concurrent requests for the same session share one
+    refresh.
+    """
+
+    def __init__(self, client, client_id, client_secret, refresh_margin=300, db=None):
+        self.client = client
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.refresh_margin = refresh_margin
+        self.db = db or get_database()
+        self.db.executescript(SCHEMA)
+        self._flight = SingleFlight()
+
+    def save(self, token_data, token_id=None):
+        token_id = token_id or uuid.uuid4().hex
+        now = time.time()
+        self.db.execute(
+            "INSERT INTO oauth_tokens (id, access_token, refresh_token, expires_at, updated_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET access_token = excluded.access_token, "
+            "refresh_token = COALESCE(excluded.refresh_token, oauth_tokens.refresh_token), "
+            "expires_at = excluded.expires_at, updated_at = excluded.updated_at",
+            (token_id, token_data["access_token"], token_data.get("refresh_token"),
+             now + float(token_data.get("expires_in", 604800)), now),
+        )
+        return token_id
+
+    def delete(self, token_id):
+        self.db.execute("DELETE FROM oauth_tokens WHERE id = ?", (token_id,))
+
+    def access_token(self, token_id):
+        """A valid access token for ``token_id``, or None if it is gone and cannot be refreshed."""
+        rows = self.db.execute("SELECT * FROM oauth_tokens WHERE id = ?", (token_id,))
+        if not rows:
+            return None
+        row = rows[0]
+        if row["expires_at"] - time.time() > self.refresh_margin:
+            return row["access_token"]
+        if not row["refresh_token"]:
+            return row["access_token"] if row["expires_at"] > time.time() else None
+        return self._flight.do(token_id, lambda: self._refresh(token_id, row["refresh_token"]))
+
+    def _refresh(self, token_id, refresh_token):
+        rows = self.db.execute("SELECT * FROM oauth_tokens WHERE id = ?", (token_id,))
+        if not rows:
+            return None
+        if rows[0]["refresh_token"] != refresh_token:
+            # another request refreshed it in the meantime; refresh tokens are single-use
+            return rows[0]["access_token"]
+        resp = self.client.request("POST", "/oauth2/token", data={
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "grant_type": "refresh_token",
+            "refresh_token": refresh_token,
+        }, headers={"Content-Type": "application/x-www-form-urlencoded"})
+        if resp.status_code in (400, 401):
+            # refresh token revoked or already used: the user has to log in again
+            self.delete(token_id)
+            return None
+        if resp.status_code >= 400:
+            raise DiscordAPIError("POST", resp.url, resp.status_code, resp.text)
+        token_data = resp.json()
+        self.save(token_data, token_id)
+        return token_data["access_token"]
+
+
+class GuildListCache:
+    """Per-token cache of ``/users/@me/guilds`` with single-flight fetches.
+
+    Entries are fresh for ``ttl`` seconds. Concurrent misses for one token
+    share a single request. When Discord rate-limits or errors, an entry up
+    to ``stale_ttl`` old is served instead.
+    """
+
+    def __init__(self, fetch, ttl=60, stale_ttl=900, max_entries=5000):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def get(self, access_token):
+        key = token_key(access_token)
+        entry = self._entry(key)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        try:
+            return self._flight.do(key, lambda: self._load(key, access_token))
+        except (DiscordAPIError, requests.RequestException) as e:
+            status = getattr(e, "status", None)
+            transient = status in TRANSIENT_STATUSES or isinstance(e, requests.RequestException)
+            if transient and entry is not None and time.monotonic() - entry[0] < self.stale_ttl:
+                self.stale += 1
+                return entry[1]
+            raise
+
+    def invalidate(self, access_token):
+        with self._lock:
+            self._entries.pop(token_key(access_token), None)
+
+    def _entry(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _load(self, key, access_token):
+        guilds = self.fetch(access_token)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), guilds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return guilds
@@ -0,0 +1,350 @@
+# backend/restore.py
+"""Plan and run a guild restore as a dependency graph of REST operations.
+
+The planner diffs a backup snapshot against the live guild. Snapshot roles
+and channels are matched to live objects by id, then by a previous run's id
+map, then by name. Only missing objects are created and only changed fields
+are edited. Running a restore twice therefore does nothing the second time,
+and a partial run can be continued.
+
+Operations refer to snapshot ids through ``Ref``. A ref is resolved to the
+live id when the operation runs, so channels wait for their category and
+for the roles named in their permission overwrites.
+"""
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+CATEGORY = 4
+ROLE_FIELDS = ("name", "permissions", "color", "hoist", "mentionable", "unicode_emoji")
+CHANNEL_FIELDS = ("name", "topic", "nsfw", "rate_limit_per_user", "bitrate", "user_limit")
+
+
+class Ref:
+    """A snapshot id, resolved to the live id when an operation runs."""
+
+    __slots__ = ("old_id",)
+
+    def __init__(self, old_id):
+        self.old_id = str(old_id)
+
+    def __eq__(self, other):
+        return isinstance(other, Ref) and other.old_id == self.old_id
+
+    def __hash__(self):
+        return hash(self.old_id)
+
+    def __repr__(self):
+        return f"Ref({self.old_id})"
+
+
+def resolve(value, id_map):
+    if isinstance(value, Ref):
+        return id_map[value.old_id]
+    if isinstance(value, dict):
+        return {k: resolve(v, id_map) for k, v in value.items()}
+    if isinstance(value, list):
+        return [resolve(v, id_map) for v in value]
+    return value
+
+
+def refs_in(value):
+    if isinstance(value, Ref):
+        yield value.old_id
+    elif isinstance(value, dict):
+        for v in value.values():
+            yield from refs_in(v)
+    elif isinstance(value, list):
+        for v in value:
+            yield from refs_in(v)
+
+
+class Op:
+    __slots__ = ("key", "kind", "name", "method", "path", "payload", "creates", "deps", "status", "error")
+
+    def __init__(self, key, kind, name, method, path, payload, creates=None):
+        self.key = key
+        self.kind = kind
+        self.name = name
+        self.method = method
+        self.path = path
+        self.payload = payload
+        # snapshot id this operation creates; the response id is mapped to it
+        self.creates = creates
+        self.deps = set()
+        self.status = "pending"
+        self.error = None
+
+    def report(self):
+        entry = {"op": self.key, "kind": self.kind, "name": self.name, "status": self.status}
+        if self.error:
+            entry["error"] = self.error
+        return entry
+
+
+class RestorePlan:
+    def __init__(self, guild_id, id_map):
+        self.guild_id = str(guild_id)
+        self.id_map = id_map
+        self.ops = {}
+
+    def add(self, op):
+        self.ops[op.key] = op
+        return op
+
+    def link(self):
+        """Make every operation depend on the ones creating the ids it refers to."""
+        creators = {op.creates: op.key for op in self.ops.values() if op.creates}
+        for op in self.ops.values():
+            for old_id in refs_in(op.payload):
+                if old_id in creators and creators[old_id] != op.key:
+                    op.deps.add(creators[old_id])
+        return self
+
+    def summary(self):
+        counts = {}
+        for op in self.ops.values():
+            counts[op.kind] = counts.get(op.kind, 0) + 1
+        return counts
+
+
+# -----------------------
+# Planning
+# -----------------------
+def _match(items, live, hints, key):
+    """Map snapshot id -> live object: same id, previous run's id map, then ``key``."""
+    live_by_id = {str(obj["id"]): obj for obj in live}
+    by_key = {}
+    for obj in live:
+        by_key.setdefault(key(obj), []).append(obj)
+    used, matched = set(), {}
+    for item in items:
+        old_id = str(item["id"])
+        obj = live_by_id.get(old_id) or live_by_id.get(str(hints.get(old_id)))
+        if obj is not None and str(obj["id"]) not in used:
+            matched[old_id] = obj
+            used.add(str(obj["id"]))
+    for item in items:
+        old_id = str(item["id"])
+        if old_id in matched:
+            continue
+        for obj in by_key.get(key(item), []):
+            if str(obj["id"]) not in used:
+                matched[old_id] = obj
+                used.add(str(obj["id"]))
+                break
+    return matched
+
+
+def _changed(item, live, fields):
+    changes = {}
+    for field in fields:
+        if field not in item:
+            continue
+        want = item[field]
+        if field == "permissions":
+            want = str(want)
+        if live.get(field) != want:
+            changes[field] = want
+    return changes
+
+
+def _overwrites(channel, role_ids, snapshot_guild, target_guild):
+    result = []
+    for ow in channel.get("permission_overwrites") or []:
+        target = str(ow["id"])
+        if ow.get("type") == 0:
+            if target == snapshot_guild:
+                target = target_guild
+            elif target in role_ids:
+                target = Ref(target)
+            else:
+                continue  # role no longer in the backup
+        result.append({"id": target, "type": ow.get("type", 0), "allow": str(ow.get("allow", 0)),
+                       "deny": str(ow.get("deny", 0))})
+    return result
+
+
+def _normalize_overwrites(overwrites, id_map):
+    # a role that is still to be created never matches a live overwrite
+    return sorted(
+        (str(id_map.get(ow["id"].old_id, ow["id"]) if isinstance(ow["id"], Ref) else ow["id"]),
+         ow["type"], str(ow["allow"]), str(ow["deny"]))
+        for ow in overwrites
+    )
+
+
+def plan_restore(guild_id, snapshot, live_roles, live_channels, id_map=None):
+    """Diff ``snapshot`` against the live guild and return a linked RestorePlan.
+
+    ``id_map`` is the id map of an earlier (possibly partial) run, used to
+    recognise the objects that run created.
+    """
+    guild_id = str(guild_id)
+    snapshot_guild = str((snapshot.get("guild_info") or {}).get("id") or guild_id)
+    hints = id_map or {}
+    id_map = {snapshot_guild: guild_id}
+    plan = RestorePlan(guild_id, id_map)
+
+    # ---- roles ----
+    roles = [r for r in snapshot.get("roles", []) if str(r["id"]) != snapshot_guild]
+    everyone = next((r for r in snapshot.get("roles", []) if str(r["id"]) == snapshot_guild), None)
+    live_everyone = next((r for r in live_roles if str(r["id"]) == guild_id), None)
+    matched = _match(roles, [r for r in live_roles if str(r["id"]) != guild_id], hints, lambda r: r["name"])
+    live_role_ids, role_ids = set(), set()
+    for role in roles:
+        old_id = str(role["id"])
+        live = matched.get(old_id)
+        if live is not None:
+            id_map[old_id] = str(live["id"])
+            live_role_ids.add(old_id)
+            role_ids.add(old_id)
+            if not live.get("managed"):
+                changes = _changed(role, live, ROLE_FIELDS)
+                if changes:
+                    plan.add(Op(f"role:{old_id}", "edit_role", role["name"], "PATCH",
+                                f"/guilds/{guild_id}/roles/{live['id']}", changes))
+        elif not role.get("managed"):
+            payload = {f: (str(role[f]) if f == "permissions" else role[f]) for f in ROLE_FIELDS if f in role}
+            plan.add(Op(f"role:{old_id}", "create_role", role["name"], "POST",
+                        f"/guilds/{guild_id}/roles", payload, creates=old_id))
+            role_ids.add(old_id)
+    if everyone and live_everyone:
+        changes = _changed(everyone, live_everyone, ("permissions",))
+        if changes:
+            plan.add(Op("role:@everyone", "edit_role", "@everyone", "PATCH",
+                        f"/guilds/{guild_id}/roles/{guild_id}", changes))
+
+    live_positions = {str(r["id"]): r.get("position") for r in live_roles}
+    positions = [
+        {"id": Ref(r["id"]), "position": r["position"]}
+        for r in roles
+        if "position" in r and str(r["id"]) in role_ids and not r.get("managed")
+        and (str(r["id"]) not in live_role_ids or live_positions.get(id_map[str(r["id"])]) != r["position"])
+    ]
+    if positions:
+        op = plan.add(Op("role_positions", "role_positions", f"{len(positions)} roles", "PATCH",
+                         f"/guilds/{guild_id}/roles", positions))
+        op.deps.update(k for k in plan.ops if k.startswith("role:"))
+
+    # ---- channels: categories first so children can reference them ----
+    channels = sorted(snapshot.get("channels", []), key=lambda c: c.get("type") != CATEGORY)
+    matched = _match(channels, live_channels, hints, lambda c: (c.get("type"), c.get("name")))
+    channel_ids = {str(c["id"]) for c in channels}
+    live_channel_ids = set()
+    for channel in channels:
+        old_id = str(channel["id"])
+        overwrites = _overwrites(channel, role_ids, snapshot_guild, guild_id)
+        parent = channel.get("parent_id")
+        parent = Ref(parent) if parent and str(parent) in channel_ids else None
+        live = matched.get(old_id)
+        if live is not None:
+            id_map[old_id] = str(live["id"])
+            live_channel_ids.add(old_id)
+            changes = _changed(channel, live, CHANNEL_FIELDS)
+            if channel.get("type") != CATEGORY:
+                live_parent = str(live["parent_id"]) if live.get("parent_id") else None
+                if parent is None and live_parent is not None:
+                    changes["parent_id"] = None
+                elif parent is not None and id_map.get(parent.old_id) != live_parent:
+                    changes["parent_id"] = parent
+            if _normalize_overwrites(overwrites, id_map) != _normalize_overwrites(
+                    [dict(ow, id=str(ow["id"])) for ow in live.get("permission_overwrites") or []], id_map):
+                changes["permission_overwrites"] = overwrites
+            if changes:
+                plan.add(Op(f"channel:{old_id}", "edit_channel", channel.get("name"), "PATCH",
+                            f"/channels/{live['id']}", changes))
+        else:
+            payload = {f: channel[f] for f in CHANNEL_FIELDS if channel.get(f) is not None}
+            payload["type"] = channel.get("type", 0)
+            payload["permission_overwrites"] = overwrites
+            if parent is not None:
+                payload["parent_id"] = parent
+            plan.add(Op(f"channel:{old_id}", "create_channel", channel.get("name"), "POST",
+                        f"/guilds/{guild_id}/channels", payload, creates=old_id))
+
+    live_positions = {str(c["id"]): c.get("position") for c in live_channels}
+    positions = [
+        {"id": Ref(c["id"]), "position": c["position"]}
+        for c in channels
+        if "position" in c
+        and (str(c["id"]) not in live_channel_ids or live_positions.get(id_map[str(c["id"])]) != c["position"])
+    ]
+    if positions:
+        op = plan.add(Op("channel_positions", "channel_positions", f"{len(positions)} channels", "PATCH",
+                         f"/guilds/{guild_id}/channels", positions))
+        op.deps.update(k for k in plan.ops if k.startswith("channel:"))
+    return plan.link()
+
+
+# -----------------------
+# Execution
+# -----------------------
+def execute_plan(plan, call, concurrency=8, progress=None, cancelled=None):
+    """Run every operation once its dependencies have succeeded.
+
+    ``call(method, path, payload)`` performs the REST request. Independent
+    operations run concurrently; the Discord client keeps each rate-limit
+    bucket within its budget. An operation whose dependency failed is
+    skipped. Returns a report whose ``id_map`` can seed a later plan.
+    """
+    lock = threading.Lock()
+    ops = plan.ops
+    done = set()
+
+    def run(op):
+        payload = resolve(op.payload, plan.id_map)
+        result = call(op.method, op.path, payload)
+        if op.creates and result:
+            with lock:
+                plan.id_map[op.creates] = str(result["id"])
+
+    def ready(op):
+        return op.status == "pending" and op.deps <= done
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        running = {}
+        while True:
+            if cancelled is not None and cancelled():
+                for op in ops.values():
+                    if op.status == "pending":
+                        op.status = "cancelled"
+            for op in ops.values():
+                if op.status == "pending" and any(ops[d].status in ("failed", "skipped", "cancelled")
+                                                  for d in op.deps if d in ops):
+                    op.status = "skipped"
+                    op.error = "dependency did not complete"
+            for op in ops.values():
+                if ready(op):
+                    op.status = "running"
+                    running[pool.submit(run, op)] = op
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                op = running.pop(future)
+                try:
+                    future.result()
+                    op.status = "done"
+                    done.add(op.key)
+                except Exception as e:
+                    op.status = "failed"
+                    op.error = str(e)
+                if progress is not None:
+                    progress(op)
+    return report(plan)
+
+
+def report(plan):
+    entries = [op.report() for op in plan.ops.values()]
+    counts = {}
+    for entry in entries:
+        counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+    complete = all(entry["status"] == "done" for entry in entries)
+    return {
+        "ok": complete,
+        "status": "done" if complete else "partial",
+        "counts": counts,
+        "planned": plan.summary(),
+        "ops": entries,
+        "id_map": plan.id_map,
+    }
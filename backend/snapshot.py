@@ -0,0 +1,84 @@
+# backend/snapshot.py
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+MEMBER_PAGE_SIZE = 1000
+
+# snapshot key -> path under /guilds/{id}
+PARTS = {
+    "guild_info": "",
+    "roles": "/roles",
+    "channels": "/channels",
+    "emojis": "/emojis",
+    "stickers": "/stickers",
+    "webhooks": "/webhooks",
+}
+# Parts the bot may lack permission for (member_roles needs the members intent);
+# a failure is recorded instead of aborting
+OPTIONAL_PARTS = {"stickers", "webhooks", "member_roles"}
+# Webhook credentials: anyone holding these can post as the webhook
+WEBHOOK_SECRETS = ("token", "url")
+
+
+def iter_member_pages(get, guild_id, page_size=MEMBER_PAGE_SIZE):
+    """Yield pages of guild members, following the ``after`` cursor."""
+    after = 0
+    while True:
+        page = get(f"/guilds/{guild_id}/members?limit={page_size}&after={after}")
+        if not page:
+            return
+        yield page
+        if len(page) < page_size:
+            return
+        after = page[-1]["user"]["id"]
+
+
+def iter_member_roles(pages):
+    """Reduce member pages to (user_id, role_ids) for members holding roles."""
+    for page in pages:
+        for member in page:
+            if member.get("roles"):
+                yield member["user"]["id"], member["roles"]
+
+
+def fetch_member_roles(get, guild_id, page_size=MEMBER_PAGE_SIZE):
+    # Only one page of full member objects is alive at a time
+    return dict(iter_member_roles(iter_member_pages(get, guild_id, page_size)))
+
+
+def strip_webhook_secrets(webhooks):
+    return [{k: v for k, v in hook.items() if k not in WEBHOOK_SECRETS} for hook in webhooks]
+
+
+def fetch_snapshot(get, guild_id, workers=8, progress=None):
+    """Fetch every part of a guild snapshot concurrently.
+
+    ``get(path)`` performs one authenticated GET and returns the decoded
+    JSON. All top-level parts and the member pager run in parallel, so the
+    latency is that of the slowest part rather than the sum. ``progress(key)``
+    is called as each part completes.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {key: pool.submit(get, f"/guilds/{guild_id}{path}") for key, path in PARTS.items()}
+        futures["member_roles"] = pool.submit(fetch_member_roles, get, guild_id)
+
+        snapshot = {}
+        errors = {}
+        keys = {future: key for key, future in futures.items()}
+        for future in as_completed(keys):
+            key = keys[future]
+            try:
+                snapshot[key] = future.result()
+                if key == "webhooks":
+                    snapshot[key] = strip_webhook_secrets(snapshot[key])
+            except Exception as e:
+                if key not in OPTIONAL_PARTS:
+                    raise
+                snapshot[key] = {} if key == "member_roles" else []
+                errors[key] = str(e)
+            if progress is not None:
+                progress(key)
+    if errors:
+        snapshot["errors"] = errors
+    snapshot["created_at"] = int(time.time())
+    return snapshot
@@ -0,0 +1,97 @@
+"""Backup snapshot latency against a local mock Discord API.
+
+Every mock endpoint sleeps for LATENCY seconds, so the sequential fetch costs
+roughly the sum of all calls and the parallel one roughly the slowest chain
+(the member pager).
+
+Run from the repo root: python -m benchmarks.bench_backup
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from backend.discord_client import DiscordClient
+from backend.snapshot import fetch_snapshot
+
+GUILD_ID = 100000000000000000
+MEMBERS = 5_000
+LATENCY = 0.05
+RUNS = 3
+
+
+def member(i):
+    return {"user": {"id": str(GUILD_ID + i)}, "roles": [str(GUILD_ID + i % 20)] if i % 3 else []}
+
+
+class MockDiscord(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(LATENCY)
+        url = urlparse(self.path)
+        tail = url.path.rsplit("/", 1)[-1]
+        if tail == "members":
+            query = parse_qs(url.query)
+            after = int(query["after"][0])
+            limit = int(query["limit"][0])
+            start = max(after - GUILD_ID + 1, 0)
+            body = [member(i) for i in range(start, min(start + limit, MEMBERS))]
+        elif tail == "roles":
+            body = [{"id": str(GUILD_ID + i), "name": f"role-{i}"} for i in range(20)]
+        elif tail == "channels":
+            body = [{"id": str(GUILD_ID + i), "name": f"channel-{i}", "type": 0} for i in range(50)]
+        elif tail in ("emojis", "stickers", "webhooks"):
+            body = []
+        else:
+            body = {"id": str(GUILD_ID), "name": "bench"}
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def sequential_snapshot(get, guild_id):
+    # The pre-parallel implementation, extended to the same parts
+    snapshot = {key: get(f"/guilds/{guild_id}{path}") for key, path in [
+        ("guild_info", ""), ("roles", "/roles"), ("channels", "/channels"), ("emojis", "/emojis"),
+        ("stickers", "/stickers"), ("webhooks", "/webhooks"),
+    ]}
+    after, roles = 0, {}
+    while True:
+        page = get(f"/guilds/{guild_id}/members?limit=1000&after={after}")
+        roles.update((m["user"]["id"], m["roles"]) for m in page if m["roles"])
+        if len(page) < 1000:
+            break
+        after = page[-1]["user"]["id"]
+    snapshot["member_roles"] = roles
+    return snapshot
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockDiscord)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = DiscordClient(base=f"http://127.0.0.1:{server.server_port}")
+
+    def get(path):
+        return client.json("GET", path)
+
+    try:
+        for name, fetch in (("sequential", sequential_snapshot), ("parallel", fetch_snapshot)):
+            start = time.perf_counter()
+            for _ in range(RUNS):
+                snapshot = fetch(get, GUILD_ID)
+            elapsed = (time.perf_counter() - start) / RUNS
+            print(f"{name}: {elapsed * 1000:.0f} ms/snapshot ({len(snapshot['member_roles'])} members with roles)")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
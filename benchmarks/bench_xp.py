@@ -0,0 +1,38 @@
+"""Award throughput and leaderboard query cost for XPEngine.
+
+Run from the repo root: python -m benchmarks.bench_xp
+"""
+import asyncio
+import os
+import tempfile
+import time
+
+from apps.db import Database
+from apps.leveling import XPEngine
+
+GUILDS = 100
+MESSAGES = 200_000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = XPEngine(cooldown=0, db=Database(os.path.join(tmp, "bench.db")))
+        start = time.perf_counter()
+        for i in range(MESSAGES):
+            engine.award(i % GUILDS, i % 20_000, now=i)
+        elapsed = time.perf_counter() - start
+        print(f"award: {MESSAGES / elapsed:,.0f} messages/s")
+
+        start = time.perf_counter()
+        for user_id in range(0, 20_000, 7):
+            engine.rank(user_id % GUILDS, user_id)
+            engine.top(user_id % GUILDS, 10)
+        print(f"rank+top10: {(time.perf_counter() - start) / (20_000 / 7) * 1e6:.1f} us/query")
+
+        start = time.perf_counter()
+        rows = asyncio.run(engine.flush())
+        print(f"flush: {rows} rows in {time.perf_counter() - start:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,4 +6,22 @@ load_dotenv()
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-BOT_NAME = os.getenv("BOT_NAME", "Renew")
\ No newline at end of file
+BOT_NAME = os.getenv("BOT_NAME", "Renew")
+DATABASE_PATH = os.getenv("DATABASE_PATH", "renew.db")
+PORT = int(os.getenv("PORT", 8080))
+
+# single | auto (AutoShardedBot in one process) | multi (one process per shard range)
+SHARD_MODE = os.getenv("SHARD_MODE", "single")
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", 0)) or None
+SHARD_IDS = [int(i) for i in os.getenv("SHARD_IDS", "").split(",") if i.strip()] or None
+WORKERS = int(os.getenv("WORKERS", os.cpu_count() or 1))
+COG_MANIFEST = os.getenv("COG_MANIFEST", "cogs.json")
+# Measure memory per cog load with tracemalloc (slows startup; for profiling only)
+COG_TRACE_MEMORY = os.getenv("COG_TRACE_MEMORY", "").lower() in ("1", "true", "yes")
+
+# Translation (shared by the dashboard API and the auto-translate cog)
+TRANSLATE_PROVIDER = os.getenv("TRANSLATE_PROVIDER", "libre")  # libre | google | deepl
+GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY", "")
+DEEPL_API_KEY = os.getenv("DEEPL_API_KEY", "")
+# Auto-translate provider budget per guild, in characters per minute
+TRANSLATE_BUDGET_PER_MINUTE = int(os.getenv("TRANSLATE_BUDGET_PER_MINUTE", 5000))
@@ -1,59 +1,79 @@
+import asyncio
+import multiprocessing
 import os
 import nextcord
 from nextcord.ext import commands, tasks
-from flask import Flask
-import asyncio
+
+from config import BOT_NAME, COG_MANIFEST, COG_TRACE_MEMORY, DISCORD_TOKEN, PORT, SHARD_COUNT, SHARD_IDS, SHARD_MODE, WORKERS
+from apps.cog_registry import CogRegistry
+from web import start_http
 
 # -----------------------
-# Flask Web Service
+# Bot Setup
 # -----------------------
-app = Flask("")
+def create_bot(sharded=False, **shard_kwargs):
+    intents = nextcord.Intents.default()
+    intents.members = True
+    intents.messages = True
+    intents.message_content = True  # Needed for on_message
 
-@app.route("/")
-def home():
-    return "Bot is running!"
+    bot_class = commands.AutoShardedBot if sharded else commands.Bot
+    bot = bot_class(
+        command_prefix="!", 
+        intents=intents, 
+        help_command=None,  # Disable default help
+        **shard_kwargs
+    )
 
-def run_flask():
-    app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 8080)))
+    # -----------------------
+    # Load Cogs (enable/disable and lazy-load them in cogs.json)
+    # -----------------------
+    CogRegistry(bot, COG_MANIFEST, trace_memory=COG_TRACE_MEMORY).load_enabled()
 
-# -----------------------
-# Bot Setup
-# -----------------------
-intents = nextcord.Intents.default()
-intents.members = True
-intents.messages = True
-intents.message_content = True  # Needed for on_message
+    # -----------------------
+    # Events
+    # -----------------------
+    @bot.event
+    async def on_ready():
+        shards = f" (shards {sorted(bot.shards)})" if sharded else ""
+        print(f"{BOT_NAME} is online as {bot.user}{shards}")
 
-bot = commands.Bot(
-    command_prefix="!", 
-    intents=intents, 
-    help_command=None  # Disable default help
-)
+    return bot
 
 # -----------------------
-# Load Cogs
+# Run bot, dashboard API & health check in one event loop
 # -----------------------
-COG_PATH = "apps.cogs"
-cogs = ["moderation", "rr", "help_cog"]  # Add other cogs here
+def run(bot, serve_http=True):
+    loop = asyncio.get_event_loop()
+    if serve_http:
+        loop.create_task(start_http(bot, port=PORT))
+    bot.run(DISCORD_TOKEN)
 
-for cog in cogs:
-    try:
-        bot.load_extension(f"{COG_PATH}.{cog}")
-        print(f"Loaded {cog}")
-    except Exception as e:
-        print(f"Failed to load cog {cog}: {e}")
+def run_worker(index):
+    # SHARD_COUNT / SHARD_IDS come from the environment set by the parent
+    bot = create_bot(sharded=True, shard_count=SHARD_COUNT, shard_ids=SHARD_IDS)
+    run(bot, serve_http=index == 0)
 
-# -----------------------
-# Events
-# -----------------------
-@bot.event
-async def on_ready():
-    print(f"Bot is online as {bot.user}")
+def run_multiprocess():
+    from apps.sharding import recommended_shards, shard_ranges
+
+    shard_count = SHARD_COUNT or recommended_shards(DISCORD_TOKEN)
+    ctx = multiprocessing.get_context("spawn")
+    workers = []
+    for index, shard_ids in enumerate(shard_ranges(shard_count, WORKERS)):
+        os.environ["SHARD_COUNT"] = str(shard_count)
+        os.environ["SHARD_IDS"] = ",".join(map(str, shard_ids))
+        worker = ctx.Process(target=run_worker, args=(index,), name=f"shards-{shard_ids[0]}-{shard_ids[-1]}")
+        worker.start()
+        print(f"Started worker {worker.name} (pid {worker.pid})")
+        workers.append(worker)
+    for worker in workers:
+        worker.join()
 
-# -----------------------
-# Run Both Flask & Bot
-# -----------------------
 if __name__ == "__main__":
-    loop = asyncio.get_event_loop()
-    loop.create_task(asyncio.to_thread(run_flask))
-    bot.run(os.environ.get("DISCORD_TOKEN"))
+    if SHARD_MODE == "multi":
+        run_multiprocess()
+    elif SHARD_MODE == "auto":
+        run(create_bot(sharded=True, shard_count=SHARD_COUNT, shard_ids=SHARD_IDS))
+    else:
+        run(create_bot())
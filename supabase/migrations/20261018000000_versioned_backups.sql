@@ -0,0 +1,23 @@
+-- Versioned, content-addressed guild backups (backend/backup_store.py).
+-- Safe to run on a fresh project and on deployments that already have the
+-- original server_backups table: existing rows keep version = null and are
+-- still read as full snapshots.
+
+create table if not exists server_backups (
+    id bigint generated always as identity primary key,
+    guild_id text not null,
+    snapshot jsonb not null,
+    created_at timestamptz not null default now()
+);
+
+alter table server_backups add column if not exists version bigint;
+
+create index if not exists server_backups_guild_created on server_backups (guild_id, created_at desc);
+create index if not exists server_backups_guild_version on server_backups (guild_id, version);
+
+create table if not exists backup_objects (
+    guild_id text not null,
+    hash text not null,
+    data jsonb not null,
+    primary key (guild_id, hash)
+);
@@ -0,0 +1,109 @@
+import asyncio
+import io
+import sys
+import time
+
+from aiohttp import web
+from multidict import CIMultiDict
+
+from backend.app import app as backend_app, jobs as backend_jobs
+
+
+class WSGIBridge:
+    """Serves a WSGI app (the Flask backend) from the aiohttp server.
+
+    Requests are handled by the event loop; only the WSGI call itself runs
+    in the loop's default executor, so no dedicated dev-server thread is
+    needed and the backend shares the process with the bot.
+    """
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    async def __call__(self, request):
+        body = await request.read()
+        environ = self.environ(request, body)
+        loop = asyncio.get_running_loop()
+        status, headers, payload = await loop.run_in_executor(None, self.call, environ)
+        code, _, reason = status.partition(" ")
+        return web.Response(status=int(code), reason=reason or None, headers=CIMultiDict(headers), body=payload)
+
+    def call(self, environ):
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response["status"] = status
+            response["headers"] = headers
+            return lambda data: None
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            payload = b"".join(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return response["status"], response["headers"], payload
+
+    @staticmethod
+    def environ(request, body):
+        host, _, port = (request.host or "localhost").partition(":")
+        environ = {
+            "REQUEST_METHOD": request.method,
+            "SCRIPT_NAME": "",
+            "PATH_INFO": request.path,
+            "QUERY_STRING": request.query_string,
+            "SERVER_NAME": host,
+            "SERVER_PORT": port or ("443" if request.secure else "80"),
+            "SERVER_PROTOCOL": f"HTTP/{request.version.major}.{request.version.minor}",
+            "REMOTE_ADDR": request.remote or "",
+            "CONTENT_TYPE": request.headers.get("Content-Type", ""),
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": request.scheme,
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        for name, value in request.headers.items():
+            name = name.upper().replace("-", "_")
+            if name in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+                continue
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+
+
+def create_app(bot):
+    started = time.time()
+    # Lets backend routes read the bot's gateway cache instead of calling REST
+    backend_app.config["DISCORD_BOT"] = bot
+    # Only the process serving HTTP runs backup/restore jobs
+    backend_jobs.start()
+
+    async def home(request):
+        return web.Response(text="Bot is running!")
+
+    async def health(request):
+        return web.json_response({
+            "ok": True,
+            "bot_ready": bot.is_ready(),
+            "latency_ms": round(bot.latency * 1000) if bot.is_ready() else None,
+            "guilds": len(bot.guilds),
+            "uptime": int(time.time() - started),
+        })
+
+    app = web.Application()
+    app.router.add_get("/", home)
+    app.router.add_get("/health", health)
+    app.router.add_route("*", "/{tail:.*}", WSGIBridge(backend_app))
+    return app
+
+
+async def start_http(bot, host="0.0.0.0", port=8080):
+    runner = web.AppRunner(create_app(bot))
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    print(f"HTTP server listening on {host}:{port}")
+    return runner